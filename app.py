@@ -1,11 +1,73 @@
+import functools
+import io
+import time
+import uuid
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from config import *
-import utilities.perturbed_potential_well_utilities as well
-import utilities.perturbed_harmonic_oscillator as harm
-import utilities.perturbed_charged_particle as char
+from config import hbar, cache_max_bytes, prefetch_workers
+from utilities import instrumentation
+from utilities.result_cache import ResultCache
+from utilities.grid import uniform_grid
+from utilities.prefetch import Prefetcher, neighbours
 
+# matplotlib and the problem modules are imported by the pages that use them,
+# so the Introduction page never pays for them.
+
+
+
+################################################
+# SHARED RESULT CACHE
+################################################
+@st.cache_resource
+def shared_results():
+    # One bounded cache per server process, shared by every session
+    return ResultCache(cache_max_bytes)
+
+results = shared_results()
+
+@st.cache_resource
+def shared_prefetcher():
+    # One capped pool per server process; its workers only fill the result cache
+    return Prefetcher(results, prefetch_workers)
+
+prefetcher = shared_prefetcher()
+if "prefetch_client" not in st.session_state:
+    st.session_state.prefetch_client = uuid.uuid4().hex
+
+def prefetch_neighbours(make_key, compute, state, axes):
+    """Compute in the background the results one slider step away from state (numbers only, no figures)."""
+    requests = [(make_key(**near), functools.partial(compute, **near)) for near in neighbours(state, axes)]
+    prefetcher.schedule(st.session_state.prefetch_client, requests)
+
+def cached_figure(key, compute, draw):
+    """PNG of a page figure, served from the shared cache when the same slider state was seen before."""
+    def render():
+        import matplotlib.pyplot as plt
+        # A neighbour being precomputed in the background is awaited, not redone.
+        # The data lookup stays out of the statistics: one request, one hit or miss.
+        prefetcher.wait(key)
+        data = results.get_or_compute(key, compute, count=False)
+        with instrumentation.stage("render"):
+            fig = draw(*data)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png", bbox_inches="tight")
+            plt.close(fig)
+        return buffer.getvalue()
+
+    return results.get_or_compute(key + ("figure",), render)
+
+
+################################################
+# DIAGNOSTICS SWITCH
+################################################
+# Hidden: open the app with ?diagnostics=1 for per-stage latency in the
+# sidebar, or ?diagnostics=profile to also capture a cProfile report.
+diagnostics = st.query_params.get("diagnostics")
+if diagnostics:
+    instrumentation.enable()
+    instrumentation.reset()
+    rerun_start = time.perf_counter()
+    profiler = instrumentation.start_profile() if diagnostics == "profile" else None
 
 
 ################################################
@@ -225,12 +287,13 @@ elif problem == "Potential well":
     $$
     then the first order correction $f_n^{(0)}(x)+f_n^{(1)}(x)$, where 
     $$
-    f_n^{(1)}(x)=\sum_{m\ne n}\frac{|\langle f_m^{(0)} \ | \ V'f_n^{(0)}|^2}{E_n^{(0)}-E_{m}^(0)} f_n^{(0)}(x)
+    f_n^{(1)}(x)=\sum_{m\ne n}\frac{\langle f_m^{(0)} \ | \ V'f_n^{(0)}\rangle}{E_n^{(0)}-E_{m}^{(0)}} f_m^{(0)}(x)
     $$
     and, finally, the second order correction $f_n^{(0)}(x)+f_n^{(1)}(x) + f_n^{(2)}(x)$, where
     $$
-    f_n^{(2)}(x)=\sum_{m\ne n}\sum_{k\ne m}\frac{|\langle f_k^{(0)} \ | \ V'f_m^{(0)}|^2|\langle f_m^{(0)} \ | \ V'f_n^{(0)}|^2}{(E_n^{(0)}-E_{m}^(0))(E_m^{(0)}-E_{k}^(0))} f_k^{(0)}(x)\,.
+    f_n^{(2)}(x)=\sum_{m\ne n}\left[\sum_{k\ne n}\frac{\langle f_m^{(0)} \ | \ V'f_k^{(0)}\rangle\langle f_k^{(0)} \ | \ V'f_n^{(0)}\rangle}{(E_n^{(0)}-E_{m}^{(0)})(E_n^{(0)}-E_{k}^{(0)})} - E_n^{(1)}\frac{\langle f_m^{(0)} \ | \ V'f_n^{(0)}\rangle}{(E_n^{(0)}-E_{m}^{(0)})^2}\right] f_m^{(0)}(x)\,,
     $$
+    with $E_n^{(1)}=\langle f_n^{(0)} \ | \ V'f_n^{(0)}\rangle$ (intermediate normalization, $\langle f_n^{(0)}|f_n^{(k)}\rangle=0$ for $k>0$).
     With the options in the menu on the left side of this page, we see that increasing $\epsilon$ increases the influence of the perturbing potential, making corrections to the energy levels and wavefunctions more pronounced. 
     Moreover, higher $n$-states exhibit larger deviations due to their higher energy levels and larger overlaps with the perturbing potential.
     ''')
@@ -238,26 +301,41 @@ elif problem == "Potential well":
     L = st.sidebar.slider("Well Length (L)", min_value=0.5, max_value=10.0, value=1.0, step=0.1)
     epsilon = st.sidebar.slider("Perturbation Strength (ε)", min_value=0.0, max_value=10.0, value=0.1, step=0.1)
     n = st.sidebar.slider("Quantum Number (n)", min_value=1, max_value=10, value=1, step=1)
-    x = np.linspace(0, L, 200)
-    E0, E1, E2, psi_0, psi_1, psi_2, psi_total = well.energy_and_wavefunctions_corrections(x, L=L, epsilon=epsilon, n=n)
-    fig, axes = plt.subplots(1, 2, figsize=(14, 8))
-    axes[0].hlines(E0, 0.5, 1.5, color='blue', label='Unperturbed $E_n^{(0)}$')
-    axes[0].hlines(E0 + E1, 1.5, 2.5, color='red', label='1st Order $E_n^{(0)} + E_n^{(1)}$')
-    axes[0].hlines(E0 + E1 + E2, 2.5, 3.5, color='green', label='2nd Order $E_n^{(0)} + E_n^{(1)} + E_n^{(2)}$')
-    axes[0].set_title('Energy Levels')
-    axes[0].set_xticks([])
-    axes[0].set_ylabel('Energy')
-    axes[0].grid(True)
-    axes[1].plot(x, psi_0, label='Unperturbed $\\psi_n^{(0)}(x)$', color='blue')
-    axes[1].plot(x, psi_0 + psi_1, label='1st Order $\\psi_n^{(0)}(x) + \\psi_n^{(1)}(x)$', color='red')
-    axes[1].plot(x, psi_total, label='2nd Order $\\psi_n^{(0)}(x) + \\psi_n^{(1)}(x) + \\psi_n^{(2)}(x)$', color='green')
-    axes[1].set_title('Wavefunctions')
-    axes[1].set_xlabel('Position $x$')
-    axes[1].set_ylabel('Wavefunction $\\psi(x)$')
-    axes[1].grid(True)
-    fig.legend(loc="lower center", bbox_to_anchor=(0.5, -0.1), ncol=3)
-    plt.tight_layout()
-    st.pyplot(fig)
+    # Key layout shared by all pages: (problem, L, ε, n, q, m, ω, grid size)
+    def make_key(L, epsilon, n):
+        return ("Potential well", L, epsilon, n, None, None, None, 200)
+    key = make_key(L, epsilon, n)
+    import matplotlib.pyplot as plt
+    from utilities import problems
+
+    def compute(L=L, epsilon=epsilon, n=n):
+        solution = problems.solve("well", x=uniform_grid(0, L, 200), L=L, epsilon=epsilon, n=n)
+        return (solution["x"], *solution["energies"], *solution["psi"], solution["psi_total"])
+
+    def draw(x, E0, E1, E2, psi_0, psi_1, psi_2, psi_total):
+        fig, axes = plt.subplots(1, 2, figsize=(14, 8))
+        axes[0].hlines(E0, 0.5, 1.5, color='blue', label='Unperturbed $E_n^{(0)}$')
+        axes[0].hlines(E0 + E1, 1.5, 2.5, color='red', label='1st Order $E_n^{(0)} + E_n^{(1)}$')
+        axes[0].hlines(E0 + E1 + E2, 2.5, 3.5, color='green', label='2nd Order $E_n^{(0)} + E_n^{(1)} + E_n^{(2)}$')
+        axes[0].set_title('Energy Levels')
+        axes[0].set_xticks([])
+        axes[0].set_ylabel('Energy')
+        axes[0].grid(True)
+        axes[1].plot(x, psi_0, label='Unperturbed $\\psi_n^{(0)}(x)$', color='blue')
+        axes[1].plot(x, psi_0 + psi_1, label='1st Order $\\psi_n^{(0)}(x) + \\psi_n^{(1)}(x)$', color='red')
+        axes[1].plot(x, psi_total, label='2nd Order $\\psi_n^{(0)}(x) + \\psi_n^{(1)}(x) + \\psi_n^{(2)}(x)$', color='green')
+        axes[1].set_title('Wavefunctions')
+        axes[1].set_xlabel('Position $x$')
+        axes[1].set_ylabel('Wavefunction $\\psi(x)$')
+        axes[1].grid(True)
+        fig.legend(loc="lower center", bbox_to_anchor=(0.5, -0.1), ncol=3)
+        plt.tight_layout()
+        return fig
+
+    st.image(cached_figure(key, compute, draw))
+    st.caption(f"Solver path: {problems.plan('well')}")
+    prefetch_neighbours(make_key, compute, {"L": L, "epsilon": epsilon, "n": n},
+                        [("epsilon", 0.1, 0.0, 10.0), ("n", 1, 1, 10), ("L", 0.1, 0.5, 10.0)])
 
 
 ################################################
@@ -354,27 +432,42 @@ elif problem == "Harmonic oscillator":
     omega = st.sidebar.slider("Frequency ω", min_value=0.5, max_value=5.0, value=1.0, step=0.5)
     epsilon = st.sidebar.slider("Perturbation strength ε", min_value=0.0, max_value=2.0, value=0.5, step=0.1)
     n = st.sidebar.slider("Quantum number n", min_value=0, max_value=8, value=0, step=1)
-    a = np.sqrt(hbar/(m*omega))  
-    x = np.linspace(-4*a, 4*a, 600)
-    E0, E1, E2, psi_0, psi_1, psi_total = harm.energy_and_wavefunctions_corrections(x, n=n, epsilon=epsilon, m=m, omega=omega, hbar=hbar)
-    fig, axes = plt.subplots(1, 2, figsize=(14, 8))
-    axes[0].hlines(E0, 0.5, 1.5, color='blue', label='Unperturbed $E_n^{(0)}$')
-    axes[0].hlines(E0+E1, 1.5, 2.5, color='red', label='1st order')
-    axes[0].hlines(E0+E1+E2, 2.5, 3.5, color='green', label='2nd order')
-    axes[0].set_title('Energy Levels')
-    axes[0].set_xticks([])
-    axes[0].set_ylabel('Energy')
-    axes[0].grid(True)
-    axes[1].plot(x, psi_0, label='Unperturbed $\\psi_n^{(0)}$', color='blue')
-    axes[1].plot(x, psi_0+psi_1, label='1st order $\\psi_n^{(0)}+\\psi_n^{(1)}$', color='red')
-    axes[1].plot(x, psi_total, label='Corrected $\\psi_n$', color='green')
-    axes[1].set_title('Wavefunctions')
-    axes[1].set_xlabel('Position $x$')
-    axes[1].set_ylabel('Wavefunction $\\psi(x)$')
-    axes[1].grid(True)
-    fig.legend(loc="lower center", bbox_to_anchor=(0.5,-0.1), ncol=3)
-    plt.tight_layout()
-    st.pyplot(fig)
+    def make_key(m, omega, epsilon, n):
+        return ("Harmonic oscillator", None, epsilon, n, None, m, omega, 600)
+    key = make_key(m, omega, epsilon, n)
+    import matplotlib.pyplot as plt
+    from utilities import problems
+
+    def compute(m=m, omega=omega, epsilon=epsilon, n=n):
+        a = np.sqrt(hbar/(m*omega))
+        solution = problems.solve("oscillator", x=uniform_grid(-4*a, 4*a, 600), wavefunction_order=1,
+                                  m=m, omega=omega, epsilon=epsilon, n=n)
+        return (solution["x"], *solution["energies"], *solution["psi"][:2], solution["psi_total"])
+
+    def draw(x, E0, E1, E2, psi_0, psi_1, psi_total):
+        fig, axes = plt.subplots(1, 2, figsize=(14, 8))
+        axes[0].hlines(E0, 0.5, 1.5, color='blue', label='Unperturbed $E_n^{(0)}$')
+        axes[0].hlines(E0+E1, 1.5, 2.5, color='red', label='1st order')
+        axes[0].hlines(E0+E1+E2, 2.5, 3.5, color='green', label='2nd order')
+        axes[0].set_title('Energy Levels')
+        axes[0].set_xticks([])
+        axes[0].set_ylabel('Energy')
+        axes[0].grid(True)
+        axes[1].plot(x, psi_0, label='Unperturbed $\\psi_n^{(0)}$', color='blue')
+        axes[1].plot(x, psi_0+psi_1, label='1st order $\\psi_n^{(0)}+\\psi_n^{(1)}$', color='red')
+        axes[1].plot(x, psi_total, label='Corrected $\\psi_n$', color='green')
+        axes[1].set_title('Wavefunctions')
+        axes[1].set_xlabel('Position $x$')
+        axes[1].set_ylabel('Wavefunction $\\psi(x)$')
+        axes[1].grid(True)
+        fig.legend(loc="lower center", bbox_to_anchor=(0.5,-0.1), ncol=3)
+        plt.tight_layout()
+        return fig
+
+    st.image(cached_figure(key, compute, draw))
+    st.caption(f"Solver path: {problems.plan('oscillator')}")
+    prefetch_neighbours(make_key, compute, {"m": m, "omega": omega, "epsilon": epsilon, "n": n},
+                        [("epsilon", 0.1, 0.0, 2.0), ("n", 1, 0, 8), ("omega", 0.5, 0.5, 5.0), ("m", 0.5, 0.5, 5.0)])
 
 
 ################################################
@@ -423,24 +516,64 @@ elif problem == "Charged particle":
     q = st.sidebar.slider("Charge q", min_value=0.5, max_value=5.0, value=1.0, step=0.5)
     E_field = st.sidebar.slider("Electric Field ε", min_value=0.0, max_value=5.0, value=0.5, step=0.1)
     n = st.sidebar.slider("Quantum number n", min_value=1, max_value=6, value=1, step=1)
-    x = np.linspace(0, L, 400)
-    E0, E1, E2, psi_0, psi_1, psi_total = char.energy_and_wavefunctions_corrections(x, L=L, n=n, q=q, E_field=E_field)
-    fig, axes = plt.subplots(1, 2, figsize=(14, 8))
-    axes[0].hlines(E0, 0.5, 1.5, color='blue', label='Unperturbed $E_n^{(0)}$')
-    axes[0].hlines(E0+E1, 1.5, 2.5, color='red', label='1st order (zero)')
-    axes[0].hlines(E0+E1+E2, 2.5, 3.5, color='green', label='2nd order')
-    axes[0].set_title('Energy Levels')
-    axes[0].set_xticks([])
-    axes[0].set_ylabel('Energy')
-    axes[0].grid(True)
-    axes[1].plot(x, psi_0, label='Unperturbed $\\psi_n^{(0)}$', color='blue')
-    axes[1].plot(x, psi_0+psi_1, label='1st order $\\psi_n^{(0)}+\\psi_n^{(1)}$', color='red')
-    axes[1].plot(x, psi_total, label='Corrected $\\psi_n$', color='green')
-    axes[1].set_title('Wavefunctions')
-    axes[1].set_xlabel('Position $x$')
-    axes[1].set_ylabel('Wavefunction $\\psi(x)$')
-    axes[1].grid(True)
-    fig.legend(loc="lower center", bbox_to_anchor=(0.5,-0.1), ncol=3)
-    plt.tight_layout()
-    st.pyplot(fig)
+    def make_key(L, q, E_field, n):
+        return ("Charged particle", L, E_field, n, q, None, None, 400)
+    key = make_key(L, q, E_field, n)
+    import matplotlib.pyplot as plt
+    from utilities import problems
 
+    def compute(L=L, q=q, E_field=E_field, n=n):
+        solution = problems.solve("charged", x=uniform_grid(0, L, 400), wavefunction_order=1,
+                                  L=L, q=q, E_field=E_field, n=n)
+        return (solution["x"], *solution["energies"], *solution["psi"][:2], solution["psi_total"])
+
+    def draw(x, E0, E1, E2, psi_0, psi_1, psi_total):
+        fig, axes = plt.subplots(1, 2, figsize=(14, 8))
+        axes[0].hlines(E0, 0.5, 1.5, color='blue', label='Unperturbed $E_n^{(0)}$')
+        axes[0].hlines(E0+E1, 1.5, 2.5, color='red', label='1st order (zero)')
+        axes[0].hlines(E0+E1+E2, 2.5, 3.5, color='green', label='2nd order')
+        axes[0].set_title('Energy Levels')
+        axes[0].set_xticks([])
+        axes[0].set_ylabel('Energy')
+        axes[0].grid(True)
+        axes[1].plot(x, psi_0, label='Unperturbed $\\psi_n^{(0)}$', color='blue')
+        axes[1].plot(x, psi_0+psi_1, label='1st order $\\psi_n^{(0)}+\\psi_n^{(1)}$', color='red')
+        axes[1].plot(x, psi_total, label='Corrected $\\psi_n$', color='green')
+        axes[1].set_title('Wavefunctions')
+        axes[1].set_xlabel('Position $x$')
+        axes[1].set_ylabel('Wavefunction $\\psi(x)$')
+        axes[1].grid(True)
+        fig.legend(loc="lower center", bbox_to_anchor=(0.5,-0.1), ncol=3)
+        plt.tight_layout()
+        return fig
+
+    st.image(cached_figure(key, compute, draw))
+    st.caption(f"Solver path: {problems.plan('charged')}")
+    prefetch_neighbours(make_key, compute, {"L": L, "q": q, "E_field": E_field, "n": n},
+                        [("E_field", 0.1, 0.0, 5.0), ("n", 1, 1, 6), ("L", 0.1, 0.5, 10.0), ("q", 0.5, 0.5, 5.0)])
+
+
+################################################
+# DIAGNOSTICS PANEL
+################################################
+if diagnostics:
+    instrumentation.record("rerun", time.perf_counter() - rerun_start)
+    report = instrumentation.stop_profile(profiler) if profiler else None
+    capture = instrumentation.snapshot()
+    instrumentation.disable()
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        st.markdown("**This rerun**")
+        stages = sorted(capture["timings"], key=capture["timings"].get, reverse=True)
+        st.table({"stage": stages, "ms": [round(1e3 * capture["timings"][name], 3) for name in stages]})
+        st.markdown("**Rolling percentiles (ms)**")
+        rolling = instrumentation.percentiles()
+        st.table({"stage": list(rolling), **{f"p{q}": [round(1e3 * rolling[name][q], 3) for name in rolling] for q in (50, 90, 99)}})
+        st.markdown("**Counters**")
+        st.json(capture["counters"])
+        st.markdown("**Result cache**")
+        st.json(results.stats())
+        st.markdown("**Prefetcher**")
+        st.json(prefetcher.stats())
+        if report:
+            st.markdown("**Profile**")
+            st.code(report)
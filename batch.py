@@ -0,0 +1,108 @@
+#------------------------------------------------------------------------------
+# batch.py
+#
+# Headless entry point: perturbative corrections of the three perturbed
+# problems over parameter ranges, without Streamlit or matplotlib. Results
+# are streamed as NDJSON (one JSON object per grid point, flushed chunk by
+# chunk) or written as a single .npz file of columns. Negative values need
+# the --name=value form, e.g. --q=-1,1.
+#
+# Usage:
+#   python batch.py well --epsilon 0:1:101 --n 1,2,3
+#   python batch.py charged --E_field 0:0.5:51 --q=-1,1 --points 200 --output charged.ndjson
+#   python batch.py oscillator --omega 0.5:2:16 --epsilon 0.1 --npz oscillator.npz
+#------------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import sys
+import numpy as np
+import config
+from utilities.parameter_study import PARAMETERS, evaluate, grid_points, wavefunctions
+
+# n defaults to the problem's own default level (1 in the box, 0 for the oscillator)
+DEFAULTS = {'L': config.L, 'n': None, 'epsilon': 0.1, 'q': 1.0, 'E_field': 0.1, 'm': config.m, 'omega': 1.0}
+
+def parse_values(text, integer=False):
+    """Values of a parameter given as start:stop:num (inclusive linspace), a comma list or a single number."""
+    if ':' in text:
+        start, stop, num = text.split(':')
+        values = np.linspace(float(start), float(stop), int(num))
+    else:
+        values = np.array([float(value) for value in text.split(',')])
+    if integer:
+        if np.any(values != np.round(values)):
+            raise argparse.ArgumentTypeError(f"'{text}' does not give integers")
+        values = values.astype(int)
+    return values
+
+def chunks(problem, grid, order, n_points, chunk_size):
+    """Yield (columns, E, x, psi) blocks of at most chunk_size grid points; x and psi are None without n_points."""
+    points = grid_points(problem, grid)
+    for start in range(0, len(points['n']), chunk_size):
+        columns = {name: values[start:start + chunk_size] for name, values in points.items()}
+        E = evaluate(problem, order, columns)
+        x, psi = wavefunctions(problem, order, columns, n_points) if n_points else (None, None)
+        yield columns, E, x, psi
+
+def write_ndjson(stream, problem, blocks):
+    """Write one JSON object per grid point, flushing after every block."""
+    for columns, E, x, psi in blocks:
+        for i in range(len(E)):
+            row = {'problem': problem}
+            row.update({name: values[i].item() for name, values in columns.items()})
+            row['E'] = E[i].tolist()
+            row['E_total'] = float(E[i].sum())
+            if psi is not None:
+                row['x'] = x[i].tolist()
+                row['psi'] = psi[i].tolist()
+            stream.write(json.dumps(row) + '\n')
+        stream.flush()
+
+def write_npz(path, problem, blocks):
+    """Collect every block and save the columns, E and optionally x and psi to one .npz file."""
+    blocks = list(blocks)
+    arrays = {name: np.concatenate([columns[name] for columns, _, _, _ in blocks]) for name in PARAMETERS[problem]}
+    arrays['E'] = np.concatenate([E for _, E, _, _ in blocks])
+    if blocks and blocks[0][3] is not None:
+        arrays['x'] = np.concatenate([x for _, _, x, _ in blocks])
+        arrays['psi'] = np.concatenate([psi for _, _, _, psi in blocks])
+    np.savez(path, problem=problem, **arrays)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perturbative corrections over parameter ranges, as NDJSON or .npz.")
+    parser.add_argument('problem', choices=list(PARAMETERS))
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f'--{name}', default=None if default is None else str(default),
+                            help=f"start:stop:num, a comma list or a value (default {default or 'the problem default'})")
+    parser.add_argument('--order', type=int, default=2, help="order of the perturbation series")
+    parser.add_argument('--points', type=int, default=0, help="also output the normalized corrected wavefunction on this many grid points")
+    parser.add_argument('--chunk-size', type=int, default=1024, help="grid points computed and flushed at a time")
+    parser.add_argument('--output', help="NDJSON file (default standard output)")
+    parser.add_argument('--npz', help="write one .npz file instead of NDJSON")
+    args = parser.parse_args(argv)
+
+    from utilities import problems
+    if args.n is None:
+        args.n = str(problems.get(args.problem).defaults['n'])
+    try:
+        grid = {name: parse_values(getattr(args, name), integer=name == 'n') for name in PARAMETERS[args.problem]}
+        problems.level_index(args.problem, grid['n'])
+    except (ValueError, argparse.ArgumentTypeError) as error:
+        parser.error(str(error))
+    blocks = chunks(args.problem, grid, args.order, args.points, args.chunk_size)
+    if args.npz:
+        write_npz(args.npz, args.problem, blocks)
+    elif args.output:
+        with open(args.output, 'w') as f:
+            write_ndjson(f, args.problem, blocks)
+    else:
+        try:
+            write_ndjson(sys.stdout, args.problem, blocks)
+        except BrokenPipeError:
+            # The consumer stopped reading (e.g. `| head`): stop quietly
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+if __name__ == '__main__':
+    main()
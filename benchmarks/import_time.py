@@ -0,0 +1,67 @@
+#------------------------------------------------------------------------------
+# import_time.py
+#
+# Cold-start import time of the modules loaded by the app, each measured in a
+# fresh interpreter with `python -X importtime`, against fixed targets.
+#
+# Usage: python benchmarks/import_time.py [--repeat 5]
+#------------------------------------------------------------------------------
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Targets in seconds (best of --repeat runs). numpy alone is most of the budget
+# of the problem modules; scipy must not be imported by any of them.
+TARGETS = {
+    'config': 0.01,
+    'utilities.result_cache': 0.02,
+    'utilities.perturbed_potential_well_utilities': 0.25,
+    'utilities.perturbed_harmonic_oscillator': 0.25,
+    'utilities.perturbed_charged_particle': 0.25,
+    'utilities.problems': 0.25,
+    'batch': 0.25,
+}
+
+# Modules that must stay out of sys.modules after importing the key
+FORBIDDEN = {
+    'config': ['numpy'],
+    'utilities.perturbed_potential_well_utilities': ['scipy', 'matplotlib'],
+    'utilities.perturbed_harmonic_oscillator': ['scipy', 'matplotlib'],
+    'utilities.perturbed_charged_particle': ['scipy', 'matplotlib'],
+    'utilities.problems': ['scipy', 'matplotlib'],
+    'batch': ['scipy', 'matplotlib', 'streamlit'],
+}
+
+def import_time(module):
+    """Cumulative import time of module in seconds, measured in a fresh interpreter."""
+    code = f"import sys, {module}; print(','.join(sorted(sys.modules)))"
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    total = 0
+    for line in out.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            total = int(fields[1])
+    return total * 1e-6, set(out.stdout.strip().split(','))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import times against targets.")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    failed = False
+    for module, target in TARGETS.items():
+        runs = [import_time(module) for _ in range(args.repeat)]
+        best = min(t for t, _ in runs)
+        leaked = [name for name in FORBIDDEN.get(module, []) if name in runs[0][1]]
+        ok = best <= target and not leaked
+        failed |= not ok
+        note = f"  imports {', '.join(leaked)}" if leaked else ""
+        print(f"{'ok  ' if ok else 'FAIL'} {module:48s} {1e3 * best:8.1f} ms  (target {1e3 * target:.0f} ms){note}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
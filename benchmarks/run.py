@@ -0,0 +1,246 @@
+#------------------------------------------------------------------------------
+# run.py
+#
+# Benchmark harness for the correction routines and the basis evaluators.
+# Every case is swept over max_states, grid size and quantum number n, and
+# reports time per call, peak traced memory and the number of perturbation
+# matrix builds and quadrature calls. Results are written as JSON and can be
+# compared against a saved baseline to flag regressions.
+#
+# Usage:
+#   python benchmarks/run.py --save benchmarks/baseline.json
+#   python benchmarks/run.py --compare benchmarks/baseline.json --threshold 0.25
+#------------------------------------------------------------------------------
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import config
+import utilities.instrumentation as instrumentation
+import utilities.matrix_elements as matrix_elements
+import utilities.perturbed_potential_well_utilities as well
+import utilities.perturbed_harmonic_oscillator as harm
+import utilities.perturbed_charged_particle as char
+import utilities.unperturbed_harmonic_oscillator as harm0
+import utilities.unperturbed_potential_well_utilities as well0
+
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+# Time the computations themselves, never reads from the persistent cache
+config.disk_cache_dir = None
+
+PROBLEM_MODULES = (well, harm, char)
+
+# Sweep axes; each case picks the ones it depends on
+SWEEP = {
+    'max_states': (10, 20, 40),
+    'points': (200, 2000, 20000),
+    'n': (1, 5),
+}
+QUICK_SWEEP = {
+    'max_states': (10,),
+    'points': (200,),
+    'n': (1,),
+}
+
+# case name -> (axes, factory(max_states, points, n) returning the call to time)
+CASES = {}
+
+def case(name, *axes):
+    """Register a benchmark factory under name, swept over the given axes."""
+    def register(factory):
+        CASES[name] = (axes, factory)
+        return factory
+    return register
+
+def box_grid(points):
+    return np.linspace(0, 1.0, points)
+
+def oscillator_grid(points):
+    return np.linspace(-4, 4, points)
+
+@case('well.energy_and_wavefunctions_corrections', 'max_states', 'points', 'n')
+def _(max_states, points, n):
+    x = box_grid(points)
+    return lambda: well.energy_and_wavefunctions_corrections(x, 1.0, 0.1, n)
+
+@case('well.Psi_1_prime', 'max_states', 'points', 'n')
+def _(max_states, points, n):
+    x = box_grid(points)
+    return lambda: well.Psi_1_prime(x, n, 0.1, 1.0)
+
+@case('well.Psi_2_prime', 'max_states', 'points', 'n')
+def _(max_states, points, n):
+    x = box_grid(points)
+    return lambda: well.Psi_2_prime(x, n, 0.1, 1.0)
+
+@case('char.energy_and_wavefunctions_corrections', 'max_states', 'points', 'n')
+def _(max_states, points, n):
+    x = box_grid(points)
+    return lambda: char.energy_and_wavefunctions_corrections(x, 1.0, n, 1.0, 0.1)
+
+@case('char.Psi_1_prime', 'max_states', 'points', 'n')
+def _(max_states, points, n):
+    x = box_grid(points)
+    return lambda: char.Psi_1_prime(x, n, 1.0, 0.1, 1.0)
+
+@case('harm.energy_and_wavefunctions_corrections', 'points', 'n')
+def _(max_states, points, n):
+    x = oscillator_grid(points)
+    return lambda: harm.energy_and_wavefunctions_corrections(x, n, 0.5, 1.0, 1.0)
+
+@case('harm.Psi_1_prime', 'points', 'n')
+def _(max_states, points, n):
+    x = oscillator_grid(points)
+    return lambda: harm.Psi_1_prime(x, n, 0.5, 1.0, 1.0)
+
+@case('basis.well_f_n', 'points', 'n')
+def _(max_states, points, n):
+    x = box_grid(points)
+    return lambda: well0.f_n(n, x, 1.0)
+
+@case('basis.box_basis', 'max_states', 'points')
+def _(max_states, points, n):
+    x = box_grid(points)
+    return lambda: matrix_elements.box_basis(max_states, x, 1.0)
+
+@case('basis.harm_f_n', 'points', 'n')
+def _(max_states, points, n):
+    x = oscillator_grid(points)
+    return lambda: harm0.f_n(n, x, 1.0, 1.0)
+
+@case('basis.hermite_functions', 'max_states', 'points')
+def _(max_states, points, n):
+    x = oscillator_grid(points)
+    return lambda: harm0.hermite_functions(max_states, x, 1.0, 1.0)
+
+def clear_caches():
+    """Drop every memoized matrix and series so each call is timed cold."""
+    for module in PROBLEM_MODULES:
+        for value in vars(module).values():
+            if hasattr(value, 'cache_clear'):
+                value.cache_clear()
+
+@contextmanager
+def max_states_set_to(value):
+    """Temporarily override max_states in every problem module."""
+    saved = [module.max_states for module in PROBLEM_MODULES]
+    for module in PROBLEM_MODULES:
+        module.max_states = value
+    try:
+        yield
+    finally:
+        for module, old in zip(PROBLEM_MODULES, saved):
+            module.max_states = old
+
+@contextmanager
+def counting():
+    """Count matrix builds, quadrature calls and basis evaluations made inside the block."""
+    counts = {}
+    instrumentation.enable()
+    instrumentation.reset()
+    try:
+        yield counts
+    finally:
+        counters = instrumentation.snapshot(record=False)['counters']
+        instrumentation.disable()
+        counts['quadrature_calls'] = counters.get('quadrature calls', 0)
+        counts['matrix_builds'] = (counts['quadrature_calls'] + counters.get('closed-form matrices', 0)
+                                   + counters.get('transform matrices', 0)
+                                   + counters.get('ladder operators', 0))
+        counts['basis_evaluations'] = counters.get('basis evaluations', 0)
+
+def measure(call, min_time=0.2, min_repeat=5, max_repeat=1000):
+    """Time a cold call repeatedly; return per-call times, peak traced bytes and counters of one call."""
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_repeat and (len(times) < min_repeat or time.perf_counter() - start < min_time):
+        clear_caches()
+        t0 = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - t0)
+    clear_caches()
+    with counting() as counts:
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return times, peak, counts
+
+def run(sweep, cases, min_time):
+    """Run every case over its sweep axes and return the list of result records."""
+    records = []
+    for name in cases:
+        axes, factory = CASES[name]
+        grid = [sweep[axis] if axis in axes else (SWEEP[axis][0],) for axis in ('max_states', 'points', 'n')]
+        for max_states, points, n in itertools.product(*grid):
+            params = {axis: value for axis, value in zip(('max_states', 'points', 'n'), (max_states, points, n)) if axis in axes}
+            with max_states_set_to(max_states):
+                times, peak, counts = measure(factory(max_states, points, n), min_time)
+            record = {
+                'case': name,
+                'params': params,
+                'time_median': statistics.median(times),
+                'time_min': min(times),
+                'repeats': len(times),
+                'peak_bytes': peak,
+                **counts,
+            }
+            records.append(record)
+            print(f"{name:45s} {json.dumps(params):48s} {1e3 * record['time_median']:10.3f} ms "
+                  f"{record['peak_bytes'] / 2**10:10.1f} KiB  builds={record['matrix_builds']} quad={record['quadrature_calls']} basis={record['basis_evaluations']}")
+    return records
+
+def record_key(record):
+    return record['case'], tuple(sorted(record['params'].items()))
+
+def compare(records, baseline, threshold):
+    """Return the records whose median time or peak memory grew by more than threshold over the baseline."""
+    reference = {record_key(r): r for r in baseline['results']}
+    regressions = []
+    for record in records:
+        old = reference.get(record_key(record))
+        if old is None:
+            continue
+        for metric in ('time_median', 'peak_bytes'):
+            if old[metric] > 0 and record[metric] > (1 + threshold) * old[metric]:
+                regressions.append((record, metric, old[metric]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the correction routines and basis evaluators.")
+    parser.add_argument('--quick', action='store_true', help="smallest sweep point of every case only")
+    parser.add_argument('--cases', nargs='*', default=list(CASES), help="subset of cases to run")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds spent timing each point")
+    parser.add_argument('--save', help="write the results as a JSON baseline to this path")
+    parser.add_argument('--compare', help="JSON baseline to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25, help="relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    records = run(QUICK_SWEEP if args.quick else SWEEP, args.cases, args.min_time)
+    if args.save:
+        meta = {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine()}
+        with open(args.save, 'w') as f:
+            json.dump({'meta': meta, 'results': records}, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(records, json.load(f), args.threshold)
+        for record, metric, old in regressions:
+            print(f"REGRESSION {record['case']} {json.dumps(record['params'])}: {metric} {old:.4g} -> {record[metric]:.4g}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -7,24 +7,64 @@
 # @ NESYA https://github.com/NesyaLab
 #------------------------------------------------------------------------------
 
-import numpy as np 
+import os
+
+# Plain settings only: importing this module must stay free of numpy and of
+# any array construction. The grids and the normalized coefficients below are
+# built on first access through the module-level __getattr__.
 
 # Size of the well
-L = 1.0  
+L = 1.0
 
 # Physical units (Plank's constand and mass)
-hbar = 1.0  
-m = 1.0  
+hbar = 1.0
+m = 1.0
 
-# Line range and time range
-x = np.linspace(0, L,  200)
-t = np.linspace(0, 10, 200)
+# Line range and time range (number of points), built lazily as x and t
+x_points = 200
+t_max = 10
+t_points = 200
 
-# Number of states and their coefficients (normalized)
+# Number of states and their coefficients (normalized lazily as coeffs)
 n = 2
-n_states = [1, 2]  
-coeffs = [1, 1]  
-coeffs = np.array(coeffs) / np.sqrt(np.sum(np.array(coeffs) ** 2))
+n_states = [1, 2]
+raw_coeffs = [1, 1]
 
 # Maximum number of perturbed states to consider
-max_states = 10  
+max_states = 10
+
+# Memory budget of the app's shared result cache (bytes)
+cache_max_bytes = 256 * 2**20
+
+# Persistent cache of perturbation matrices and basis tables shared by
+# processes and app replicas (disabled when the directory is None)
+disk_cache_dir = os.environ.get('PERTURBATIVE_CACHE_DIR')
+disk_cache_max_bytes = 2 * 2**30
+
+# Background threads per app server precomputing neighbouring slider values
+prefetch_workers = 2
+
+# Plain settings only: a star import must not build the lazy x, t and coeffs,
+# which are reached as config.x or imported by name
+__all__ = ['L', 'hbar', 'm', 'x_points', 't_max', 't_points', 'n', 'n_states', 'raw_coeffs', 'max_states',
+           'cache_max_bytes', 'disk_cache_dir', 'disk_cache_max_bytes', 'prefetch_workers']
+
+def _x():
+    import numpy as np
+    return np.linspace(0, L, x_points)
+
+def _t():
+    import numpy as np
+    return np.linspace(0, t_max, t_points)
+
+def _coeffs():
+    import numpy as np
+    return np.array(raw_coeffs) / np.sqrt(np.sum(np.array(raw_coeffs) ** 2))
+
+_lazy = {'x': _x, 't': _t, 'coeffs': _coeffs}
+
+def __getattr__(name):
+    if name not in _lazy:
+        raise AttributeError(f"module 'config' has no attribute '{name}'")
+    value = globals()[name] = _lazy[name]()
+    return value
@@ -0,0 +1,23 @@
+import json
+import pytest
+import batch
+
+def _rows(tmp_path, *argv):
+    path = tmp_path / 'out.ndjson'
+    batch.main([*argv, '--output', str(path)])
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_level_defaults_follow_the_problem(tmp_path):
+    assert [row['n'] for row in _rows(tmp_path, 'oscillator')] == [0]
+    assert [row['n'] for row in _rows(tmp_path, 'well')] == [1]
+
+def test_grid_expands_to_one_row_per_point(tmp_path):
+    rows = _rows(tmp_path, 'charged', '--E_field', '0:0.2:3', '--q=-1,1')
+    assert len(rows) == 6
+    assert {row['q'] for row in rows} == {-1.0, 1.0}
+
+@pytest.mark.parametrize('argv', [['well', '--n', '0'], ['oscillator', '--n=-1']])
+def test_levels_below_the_first_are_rejected(argv, capsys):
+    with pytest.raises(SystemExit):
+        batch.main(argv)
+    assert 'levels start at' in capsys.readouterr().err
@@ -0,0 +1,11 @@
+import subprocess
+import sys
+
+def _run(code):
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip()
+
+def test_star_import_stays_free_of_numpy():
+    assert _run("import sys; from config import *; print('numpy' in sys.modules)") == 'False'
+
+def test_lazy_settings_are_built_on_access():
+    assert _run("import config; print(config.x.shape, round(config.coeffs @ config.coeffs, 12))") == '(200,) 1.0'
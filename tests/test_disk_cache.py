@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import config
+import utilities.matrix_elements as matrix_elements
+from utilities.disk_cache import DiskCache, cache_key
+from utilities.matrix_elements import box_basis
+
+def test_store_and_load_round_trip(tmp_path):
+    cache = DiskCache(str(tmp_path), 2**20)
+    key = cache_key({'matrix': 'test', 'n_max': 4})
+    assert cache.load(key) is None
+    array = np.arange(12.0).reshape(3, 4)
+    cache.store(key, array)
+    loaded = cache.load(key)
+    np.testing.assert_array_equal(loaded, array)
+    assert not loaded.flags.writeable
+
+def test_get_or_compute_computes_once(tmp_path):
+    cache = DiskCache(str(tmp_path), 2**20)
+    calls = []
+    compute = lambda: calls.append(1) or np.ones(5)
+    for _ in range(3):
+        np.testing.assert_array_equal(cache.get_or_compute({'table': 'ones'}, compute), np.ones(5))
+    assert len(calls) == 1
+
+def test_numpy_scalars_key_like_python_numbers():
+    assert cache_key({'n_max': np.int64(10), 'L': np.float32(0.5)}) == cache_key({'n_max': 10, 'L': 0.5})
+    assert cache_key({'n_max': 10}) != cache_key({'n_max': 11})
+    with pytest.raises(TypeError):
+        cache_key({'x': object()})
+
+def test_eviction_keeps_the_total_within_budget(tmp_path):
+    entry = np.zeros(1000)
+    cache = DiskCache(str(tmp_path), 5 * entry.nbytes)
+    for i in range(12):
+        cache.store(f'k{i}', entry)
+    total = sum(size for _, size, _ in cache.entries())
+    assert total <= cache.max_bytes
+    assert cache.bytes == total
+    # The most recent entry survives
+    assert cache.load('k11') is not None
+
+def test_keys_are_not_hashed_without_a_cache(monkeypatch):
+    monkeypatch.setattr(config, 'disk_cache_dir', None)
+    monkeypatch.setattr(matrix_elements, 'fingerprint', lambda array: pytest.fail('grid hashed with the cache off'))
+    assert box_basis(3, np.linspace(0.0, 1.0, 11), 1.0).shape == (3, 11)
+
+def test_basis_tables_are_served_from_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'disk_cache_dir', str(tmp_path))
+    x = np.linspace(0.0, 1.0, 11)
+    first = box_basis(3, x, 1.0)
+    second = box_basis(3, x, 1.0)
+    assert isinstance(second, np.memmap)
+    np.testing.assert_array_equal(first, second)
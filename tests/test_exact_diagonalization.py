@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from utilities.ladder_operators import polynomial_operator
+from utilities.exact_diagonalization import (LANCZOS_MIN_SIZE, banded_eigensystem, dense_eigensystem,
+                                             tridiagonal_eigensystem)
+
+def _check_eigenpairs(w, v, H, levels):
+    w_ref, v_ref = np.linalg.eigh(H)
+    np.testing.assert_allclose(w, w_ref[levels], rtol=1e-10, atol=1e-10)
+    # Eigenvectors agree up to sign
+    np.testing.assert_allclose(np.abs(np.sum(v * v_ref[:, levels], axis=0)), 1.0, atol=1e-8)
+
+def test_tridiagonal_and_dense_eigensystems_match_eigh():
+    H = polynomial_operator((0.0, 0.3), 80, 1.0, 1.0, 1.0).plus_diagonal(np.arange(80) + 0.5)
+    levels = np.array([0, 3, 7])
+    _check_eigenpairs(*tridiagonal_eigensystem(H.diagonal(), H.diagonal(1), levels), H.toarray(), levels)
+    _check_eigenpairs(*dense_eigensystem(H.toarray(), levels), H.toarray(), levels)
+
+@pytest.mark.parametrize('N', [200, LANCZOS_MIN_SIZE + 200])
+def test_banded_eigensystem_matches_eigh(N):
+    # Anharmonic oscillator: bandwidth 4, and above LANCZOS_MIN_SIZE the shift-invert path
+    H = polynomial_operator((0.0, 0.0, 0.5, 0.0, 0.1), N, 1.0, 1.0, 1.0).plus_diagonal(np.arange(N) + 0.5)
+    levels = np.array([0, 1, 5])
+    _check_eigenpairs(*banded_eigensystem(H.upper_banded(), levels), H.toarray(), levels)
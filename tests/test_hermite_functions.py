@@ -0,0 +1,15 @@
+import numpy as np
+from utilities.unperturbed_harmonic_oscillator import hermite_functions
+
+def test_hermite_functions_are_orthonormal():
+    m, omega, hbar = 2.0, 0.5, 1.0
+    x = np.linspace(-20, 20, 8001)
+    psi = hermite_functions(60, x, m, omega, hbar)
+    # The trapezoid rule is spectrally accurate for these rapidly decaying functions
+    gram = (psi * np.gradient(x)) @ psi.T
+    np.testing.assert_allclose(gram, np.eye(61), rtol=0, atol=1e-10)
+
+def test_hermite_functions_stay_finite_at_high_order():
+    x = np.linspace(-60, 60, 2001)
+    psi = hermite_functions(1500, x, 1.0, 1.0, 1.0)
+    assert np.all(np.isfinite(psi))
@@ -0,0 +1,35 @@
+import threading
+from utilities import instrumentation
+
+def test_switch_and_captures_are_per_thread():
+    seen = {}
+
+    def other_session():
+        seen['enabled'] = instrumentation.enabled()
+        instrumentation.enable()
+        instrumentation.disable()
+
+    instrumentation.enable()
+    instrumentation.reset()
+    try:
+        thread = threading.Thread(target=other_session)
+        thread.start()
+        thread.join()
+        # The other thread neither saw our switch nor turned it off
+        assert seen['enabled'] is False
+        assert instrumentation.enabled()
+        with instrumentation.stage('work'):
+            pass
+        instrumentation.count('calls', 2)
+        capture = instrumentation.snapshot(record=False)
+        assert 'work' in capture['timings'] and capture['counters'] == {'calls': 2}
+    finally:
+        instrumentation.disable()
+
+def test_disabled_instrumentation_records_nothing():
+    instrumentation.disable()
+    instrumentation.reset()
+    with instrumentation.stage('work'):
+        pass
+    instrumentation.count('calls')
+    assert instrumentation.snapshot(record=False) == {'timings': {}, 'counters': {}}
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from utilities.matrix_elements import perturbation_matrix, polynomial_matrix, quadrature_matrix, transform_matrix
+
+@pytest.mark.parametrize('coeffs', [(0.0, 1.0), (0.0, 0.0, 1.0), (0.3, -1.2, 0.0, 2.0, 0.5)])
+def test_closed_form_matrix_matches_quadrature(coeffs):
+    L, n_max = 1.7, 25
+    closed = polynomial_matrix(coeffs, L, n_max)
+    quadrature = quadrature_matrix(lambda x: np.polynomial.polynomial.polyval(x, coeffs), L, n_max)
+    np.testing.assert_allclose(closed, quadrature, rtol=0, atol=1e-13 * max(1.0, np.abs(closed).max()))
+
+def test_transform_matrix_matches_quadrature():
+    L, n_max = 2.0, 30
+    V = lambda x: np.exp(-x) * np.sin(3 * x)
+    np.testing.assert_allclose(transform_matrix(V, L, n_max), quadrature_matrix(V, L, n_max), rtol=0, atol=1e-10)
+
+def test_transform_matrix_rejects_undersampled_potentials():
+    with pytest.raises(ValueError, match='at least 81 samples'):
+        transform_matrix(np.ones(79), 1.0, 20)
+
+def test_perturbation_matrix_passes_quadrature_settings():
+    V = lambda x: np.cos(x)
+    np.testing.assert_allclose(perturbation_matrix(V, 1.0, 10, method='quadrature', n_nodes=200),
+                               perturbation_matrix(V, 1.0, 10, method='transform'), rtol=0, atol=1e-10)
+
+def test_perturbation_matrix_treats_arrays_as_samples():
+    L, n_max = 1.0, 10
+    x = np.linspace(0.0, L, 401)
+    H = perturbation_matrix(np.exp(-x), L, n_max)
+    np.testing.assert_allclose(H, quadrature_matrix(lambda x: np.exp(-x), L, n_max), rtol=0, atol=1e-8)
+    # Tuples stay monomial coefficients
+    np.testing.assert_allclose(perturbation_matrix((0.0, 1.0), L, n_max), polynomial_matrix((0.0, 1.0), L, n_max))
+
+def test_perturbation_matrix_rejects_ambiguous_input():
+    with pytest.raises(ValueError, match='tuple'):
+        perturbation_matrix([0.0, 1.0], 1.0, 10)
+    with pytest.raises(ValueError):
+        perturbation_matrix(np.ones((3, 3)), 1.0, 10)
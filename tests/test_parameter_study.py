@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from utilities.parameter_study import load_study, run_study
+
+GRID = {'L': [1.0, 2.0], 'n': [1, 2], 'epsilon': np.linspace(0.0, 1.0, 5)}
+
+def test_resume_fills_only_unfinished_chunks(tmp_path):
+    fresh = run_study('well', GRID, tmp_path / 'fresh', chunk_size=6, workers=1, n_points=20)
+    partial = run_study('well', GRID, tmp_path / 'partial', chunk_size=6, workers=1, n_points=20)
+    # Forget chunks 1 and 3, as if the run had stopped before writing them
+    done = np.load(tmp_path / 'partial' / 'done.npy', mmap_mode='r+')
+    E = np.load(tmp_path / 'partial' / 'E.npy', mmap_mode='r+')
+    done[[1, 3]] = False
+    E[6:12] = np.nan
+    E[18:24] = np.nan
+    done.flush()
+    E.flush()
+    del done, E
+    resumed = run_study('well', GRID, tmp_path / 'partial', chunk_size=6, workers=1, n_points=20)
+    assert resumed['done'].all()
+    for name in ('E', 'x', 'psi', 'L', 'n', 'epsilon'):
+        np.testing.assert_array_equal(resumed[name], fresh[name])
+
+def test_energy_only_studies_have_no_wavefunction_columns(tmp_path):
+    study = run_study('well', GRID, tmp_path, chunk_size=7, workers=1)
+    assert 'psi' not in study and 'x' not in study
+    assert study['E'].shape == (20, 3)
+
+def test_resume_rejects_a_different_study(tmp_path):
+    run_study('well', GRID, tmp_path, chunk_size=6, workers=1)
+    with pytest.raises(ValueError, match='different study'):
+        run_study('well', GRID, tmp_path, chunk_size=6, workers=1, order=3)
+    with pytest.raises(ValueError, match='different study'):
+        run_study('well', GRID, tmp_path, chunk_size=6, workers=1, n_points=10)
+    assert set(load_study(tmp_path)) >= {'E', 'done', 'L', 'n', 'epsilon'}
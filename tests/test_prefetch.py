@@ -0,0 +1,42 @@
+import threading
+from utilities.prefetch import Prefetcher, neighbours
+from utilities.result_cache import ResultCache
+
+def test_neighbours_stay_within_slider_bounds():
+    found = neighbours({'L': 1.0, 'n': 1}, [('n', 1, 1, 6), ('L', 0.1, 0.5, 1.0)])
+    # n = 0 and L = 1.1 lie outside the sliders; 1.0 - 0.1 is rounded to the slider's 0.9
+    assert found == [{'L': 1.0, 'n': 2}, {'L': 0.9, 'n': 1}]
+
+def test_rescheduling_cancels_only_work_nobody_wants():
+    cache = ResultCache(2**20)
+    prefetcher = Prefetcher(cache, max_workers=1)
+    release = threading.Event()
+    started = threading.Event()
+    computed = []
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return 'block'
+
+    def compute(key):
+        return lambda: computed.append(key) or key
+
+    try:
+        # The single worker is held by 'block', so everything else stays queued
+        prefetcher.schedule('a', [('block', blocking), ('a1', compute('a1')), ('a2', compute('a2'))])
+        assert started.wait(5)
+        prefetcher.schedule('b', [('b1', compute('b1'))])
+        # Client a moves on: its stale keys are cancelled, b's key survives
+        prefetcher.schedule('a', [('a3', compute('a3'))])
+        assert prefetcher.stats()['cancelled'] == 2
+        release.set()
+        for key in ('block', 'b1', 'a3'):
+            prefetcher.wait(key, timeout=5)
+        assert sorted(computed) == ['a3', 'b1']
+        assert 'a1' not in cache and 'a2' not in cache
+        # The running task still lands in the cache
+        assert 'block' in cache and 'b1' in cache and 'a3' in cache
+    finally:
+        release.set()
+        prefetcher.shutdown()
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from utilities.rayleigh_schrodinger import rs_series
+from utilities.ladder_operators import polynomial_operator
+
+def test_rs_series_linear_field_oscillator_is_exact_at_second_order():
+    # H0 + εx is a shifted oscillator: E = ħω(n+1/2) - ε²/(2mω²), nothing beyond E^(2)
+    m, omega, hbar, epsilon, n = 1.3, 0.7, 1.0, 0.2, 3
+    N = 40
+    E, C = rs_series(hbar * omega * (np.arange(N) + 0.5), polynomial_operator((0.0, epsilon), N, m, omega, hbar), n, 6)
+    assert E[0] == pytest.approx(hbar * omega * (n + 0.5))
+    assert E[1] == pytest.approx(0.0, abs=1e-14)
+    assert E[2] == pytest.approx(-epsilon**2 / (2 * m * omega**2), rel=1e-12)
+    np.testing.assert_allclose(E[3:], 0.0, atol=1e-13)
+    # Intermediate normalization
+    np.testing.assert_allclose(C[1:, n], 0.0)
+
+def test_rs_series_matches_dense_diagonalization():
+    rng = np.random.default_rng(0)
+    N, n, g = 30, 2, 1e-3
+    V = rng.normal(size=(N, N))
+    V = V + V.T
+    E0 = np.arange(N, dtype=float) ** 2
+    E, _ = rs_series(E0, V, n, 4)
+    exact = np.linalg.eigvalsh(np.diag(E0) + g * V)[n]
+    assert E @ g ** np.arange(5) == pytest.approx(exact, abs=1e-13)
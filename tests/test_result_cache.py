@@ -0,0 +1,30 @@
+import numpy as np
+from utilities.result_cache import ResultCache
+
+def test_lru_eviction_by_size():
+    cache = ResultCache(max_bytes=3 * 800)
+    for key in 'abc':
+        cache.put(key, np.zeros(100))
+    cache.get('a')
+    cache.put('d', np.zeros(100))
+    # 'b' was the least recently used entry
+    assert 'b' not in cache and all(key in cache for key in 'acd')
+    assert cache.bytes <= cache.max_bytes and cache.evictions == 1
+
+def test_oversized_values_are_not_stored():
+    cache = ResultCache(max_bytes=100)
+    cache.put('big', np.zeros(100))
+    assert 'big' not in cache and cache.bytes == 0
+
+def test_get_or_compute_counts_one_lookup():
+    cache = ResultCache(2**20)
+    calls = []
+    compute = lambda: calls.append(1) or b'png'
+    assert cache.get_or_compute('k', compute) == b'png'
+    assert cache.get_or_compute('k', compute) == b'png'
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Uncounted lookups leave the statistics alone
+    cache.get_or_compute('k', compute, count=False)
+    cache.get('missing', count=False)
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from utilities.grid import Grid, trapezoid_weights
+from utilities.synthesis import synthesize
+import utilities.perturbed_potential_well_utilities as well
+import utilities.perturbed_charged_particle as char
+import utilities.perturbed_harmonic_oscillator as harm
+
+def test_blocks_match_one_shot_synthesis():
+    x = np.linspace(0.0, 1.0, 1001)
+    coeffs = np.array([1.0, 0.3, -0.2])
+    tabulate = lambda xb: np.array([np.sin(k * np.pi * xb) for k in (1, 2, 3)])
+    direct = coeffs @ tabulate(x)
+    direct /= np.sqrt(np.sum(trapezoid_weights(x) * direct**2))
+    np.testing.assert_allclose(synthesize(coeffs, tabulate, x, chunk_size=37), direct, rtol=0, atol=1e-13)
+    np.testing.assert_allclose(synthesize(coeffs, tabulate, (0.0, 1.0, 1001), chunk_size=37), direct, rtol=0, atol=1e-13)
+
+@pytest.mark.parametrize('call, x', [
+    (lambda x: well.corrected_wavefunction(x, 1.0, 0.1, 1), np.linspace(0.0, 1.0, 501)),
+    (lambda x: char.corrected_wavefunction(x, 1.0, 2, 1.0, 0.3), np.linspace(0.0, 1.0, 501)),
+    (lambda x: harm.corrected_wavefunction(x, 1, 0.2, 1.0, 1.0), np.linspace(-6.0, 6.0, 501)),
+])
+def test_corrected_wavefunction_accepts_a_grid(call, x):
+    np.testing.assert_allclose(call(Grid(x)), call(x))
+
+def test_wavefunction_synthesize_accepts_a_grid():
+    x = np.linspace(0.0, 1.0, 501)
+    _, states = well.state_corrections(1, 0.1, 1.0)
+    state = sum(states)
+    np.testing.assert_allclose(state.synthesize(Grid(x), chunk_size=64), state.evaluate(x), rtol=0, atol=1e-13)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from utilities.wavefunction import box_state, oscillator_state
+import utilities.perturbed_potential_well_utilities as well
+
+def test_norm_and_overlap_follow_parseval():
+    x = np.linspace(0.0, 2.0, 4001)
+    a = box_state([0.6, 0.0, 0.8], 2.0)
+    b = box_state([1.0, 1.0], 2.0)
+    assert a.norm() == pytest.approx(1.0)
+    assert a.overlap(b) == pytest.approx(0.6)
+    assert np.trapezoid(a(x) * b(x), x) == pytest.approx(0.6, abs=1e-6)
+    assert (3 * b).normalized().norm() == pytest.approx(1.0)
+
+def test_algebra_matches_values_on_a_grid():
+    x = np.linspace(-5.0, 5.0, 301)
+    a = oscillator_state([1.0, 0.5], 1.0, 1.0)
+    b = oscillator_state([0.0, 0.0, 2.0], 1.0, 1.0)
+    np.testing.assert_allclose((2 * a - b / 4)(x), 2 * a(x) - b(x) / 4, atol=1e-14)
+    np.testing.assert_allclose(sum([a, b, -a])(x), b(x), atol=1e-14)
+
+def test_corrections_match_psi_prime():
+    x = np.linspace(0.0, 1.0, 201)
+    _, states = well.state_corrections(2, 0.5, 1.0)
+    np.testing.assert_allclose(states[2](x), well.Psi_2_prime(x, 2, 0.5, 1.0))
+
+@pytest.mark.parametrize('operation', [
+    lambda w: w * w,
+    lambda w: np.array([1.0, 2.0]) * w,
+    lambda w: w / np.array([1.0, 2.0]),
+    lambda w: w + 1.0,
+    lambda w: w - np.ones(2),
+    lambda w: w.overlap(np.ones(2)),
+])
+def test_non_states_raise_type_error(operation):
+    with pytest.raises(TypeError):
+        operation(box_state([1.0, 0.0], 1.0))
+
+def test_bases_must_agree():
+    with pytest.raises(ValueError, match='bases'):
+        box_state([1.0], 1.0) + box_state([1.0], 2.0)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+import config
+
+# Part of every key: bump whenever the construction of a cached array changes
+CODE_VERSION = 1
+
+def fingerprint(array):
+    """Content hash of an array, for keys that depend on a grid."""
+    array = np.ascontiguousarray(array, dtype=float)
+    return hashlib.sha256(array.tobytes()).hexdigest() + str(array.shape)
+
+def _plain(value):
+    # NumPy scalars as the Python numbers they equal, so np.int64(10) keys like 10
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    raise TypeError(f"cannot key on {type(value).__name__}")
+
+def cache_key(parts):
+    """Content address of an array described by the JSON-serializable dict parts."""
+    text = json.dumps({'code_version': CODE_VERSION, **parts}, sort_keys=True, default=_plain)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+class DiskCache:
+    """Content-addressed store of arrays as .npy files, read back memory-mapped.
+
+    Files are written atomically (temporary file plus rename), so several
+    processes can share one directory. Reads refresh a file's mtime and the
+    least recently used files are deleted once the total exceeds max_bytes.
+    The total is a running count of this process's writes on top of one
+    directory scan; the directory is scanned again only to evict.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.bytes = None
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.npy')
+
+    def load(self, key):
+        """Memory-mapped, read-only array stored under key, or None."""
+        try:
+            array = np.load(self.path(key), mmap_mode='r')
+            os.utime(self.path(key))
+        except (FileNotFoundError, ValueError):
+            return None
+        return array
+
+    def store(self, key, array):
+        """Write array under key and evict old entries once the total exceeds max_bytes."""
+        if self.bytes is None:
+            self.bytes = sum(size for _, size, _ in self.entries())
+        tmp = os.path.join(self.directory, f'.{key}.{uuid.uuid4().hex}.tmp')
+        with open(tmp, 'wb') as f:
+            np.save(f, np.asarray(array))
+            size = f.tell()
+        try:
+            # A concurrent writer may have stored the same key already
+            self.bytes -= os.stat(self.path(key)).st_size
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, self.path(key))
+        self.bytes += size
+        if self.bytes > self.max_bytes:
+            self.evict()
+
+    def get_or_compute(self, parts, compute):
+        """Array described by parts, loaded from disk or computed and stored on a miss."""
+        key = cache_key(parts)
+        array = self.load(key)
+        if array is None:
+            array = compute()
+            self.store(key, array)
+        return array
+
+    def entries(self):
+        """(mtime, size, path) of every stored file."""
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npy'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            found.append((stat.st_mtime, stat.st_size, os.path.join(self.directory, name)))
+        return found
+
+    def evict(self):
+        """Delete least recently used files until the total size fits in max_bytes."""
+        found = sorted(self.entries())
+        total = sum(size for _, size, _ in found)
+        for _, size, path in found:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self.bytes = total
+
+_default = None
+
+def default_cache():
+    """Process-wide cache configured by config.disk_cache_dir, or None when disabled."""
+    global _default
+    if config.disk_cache_dir is None:
+        return None
+    if _default is None or _default.directory != config.disk_cache_dir:
+        _default = DiskCache(config.disk_cache_dir, config.disk_cache_max_bytes)
+    return _default
+
+def cached_array(parts, compute):
+    """compute() through the default disk cache when one is configured.
+
+    parts may be a function returning the dict, so that keys hashing a grid
+    or samples cost nothing while the cache is disabled.
+    """
+    cache = default_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(parts() if callable(parts) else parts, compute)
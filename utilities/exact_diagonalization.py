@@ -0,0 +1,117 @@
+import numpy as np
+from utilities.instrumentation import timed
+
+# scipy.linalg is imported inside the solvers: it dominates the import time of
+# the problem modules and only the exact backend needs it.
+
+# Beyond this size the banded LAPACK driver, whose reduction to tridiagonal
+# form costs O(N²) time and memory, gives way to shift-invert Lanczos on a
+# banded Cholesky factor, which costs O(b² N) per iteration.
+LANCZOS_MIN_SIZE = 1000
+
+def _index_range(levels):
+    levels = np.atleast_1d(levels)
+    return int(levels.min()), int(levels.max()), levels - levels.min()
+
+@timed('diagonalization')
+def tridiagonal_eigensystem(d, e, levels):
+    """Eigenpairs of the symmetric tridiagonal matrix (d, e) for the given 0-based level indices."""
+    from scipy.linalg import eigh_tridiagonal
+    lo, hi, pick = _index_range(levels)
+    w, v = eigh_tridiagonal(d, e, select='i', select_range=(lo, hi))
+    return w[pick], v[:, pick]
+
+@timed('diagonalization')
+def banded_eigensystem(ab, levels):
+    """Eigenpairs of a symmetric matrix in upper banded storage, ab[b + i - j, j] = H[i, j]."""
+    from scipy.linalg import eig_banded
+    lo, hi, pick = _index_range(levels)
+    if ab.shape[1] > LANCZOS_MIN_SIZE:
+        w, v = lowest_banded_eigensystem(ab, hi + 1)
+        return w[lo:][pick], v[:, lo:][:, pick]
+    w, v = eig_banded(ab, select='i', select_range=(lo, hi))
+    return w[pick], v[:, pick]
+
+def symmetric_band_matvec(diagonals, v):
+    """H @ v, v a vector or a stack of column vectors, for symmetric H given by its upper diagonals 0..b."""
+    v = np.asarray(v)
+    N = len(v)
+    # Broadcast the diagonals over trailing columns of a stack of vectors
+    shape = (-1,) + (1,) * (v.ndim - 1)
+    out = np.reshape(diagonals[0], shape) * v
+    for p in range(1, len(diagonals)):
+        d = np.reshape(diagonals[p], shape)
+        out[:N - p] += d * v[p:]
+        out[p:] += d * v[:N - p]
+    return out
+
+def banded_matvec(ab, v):
+    """H @ v for H in upper banded storage."""
+    b = ab.shape[0] - 1
+    return symmetric_band_matvec([ab[b - p, p:] for p in range(b + 1)], v)
+
+def lowest_banded_eigensystem(ab, k):
+    """The k lowest eigenpairs of a large symmetric banded matrix by shift-invert Lanczos.
+
+    The shift σ is placed below the spectrum, which the success of the
+    Cholesky factorization of H - σ certifies, so the k eigenvalues nearest
+    to σ are exactly the k lowest ones.
+    """
+    from scipy.linalg import LinAlgError, cho_solve_banded, cholesky_banded, eig_banded
+    from scipy.sparse.linalg import LinearOperator, eigsh
+    b, N = ab.shape[0] - 1, ab.shape[1]
+    # The ground level of a leading block bounds that of H from above
+    head = eig_banded(ab[:, :min(N, max(4 * k, 256))], eigvals_only=True, select='i', select_range=(0, 0))[0]
+    gap = max(abs(head), 1.0) * 1e-3
+    while True:
+        shifted = ab.copy()
+        shifted[b] -= head - gap
+        try:
+            factor = cholesky_banded(shifted)
+            break
+        except LinAlgError:
+            gap *= 4
+    H = LinearOperator((N, N), matvec=lambda v: banded_matvec(ab, v), dtype=float)
+    inverse = LinearOperator((N, N), matvec=lambda v: cho_solve_banded((factor, False), v), dtype=float)
+    w, v = eigsh(H, k=k, sigma=head - gap, which='LM', OPinv=inverse)
+    order = np.argsort(w)
+    return w[order], v[:, order]
+
+@timed('diagonalization')
+def dense_eigensystem(H, levels):
+    """Eigenpairs of a dense symmetric matrix for the given 0-based level indices."""
+    from scipy.linalg import eigh
+    lo, hi, pick = _index_range(levels)
+    w, v = eigh(H, subset_by_index=[lo, hi])
+    return w[pick], v[:, pick]
+
+def bandwidth(H):
+    """Number of nonzero off-diagonals of a square matrix."""
+    rows, cols = np.nonzero(H)
+    return int(np.abs(rows - cols).max()) if len(rows) else 0
+
+def upper_banded(H, b):
+    """Upper banded storage of the symmetric matrix H with bandwidth b."""
+    ab = np.zeros((b + 1, len(H)))
+    for k in range(b + 1):
+        ab[b - k, k:] = np.diagonal(H, k)
+    return ab
+
+def eigensystem(H, levels):
+    """Eigenpairs of symmetric H with the cheapest solver its structure allows.
+
+    Returns the eigenvalues, the eigenvectors as columns, and the name of the
+    solver used: 'tridiagonal', 'banded' or 'dense'.
+    """
+    H = np.asarray(H, dtype=float)
+    b = bandwidth(H)
+    if b <= 1:
+        return tridiagonal_eigensystem(np.diagonal(H), np.diagonal(H, 1), levels) + ('tridiagonal',)
+    if 4 * b < len(H):
+        return banded_eigensystem(upper_banded(H, b), levels) + ('banded',)
+    return dense_eigensystem(H, levels) + ('dense',)
+
+def align_phase(vectors, reference):
+    """Flip eigenvector signs so each has a non-negative component on its reference basis index."""
+    cols = np.arange(vectors.shape[1])
+    return vectors * np.where(vectors[reference, cols] < 0, -1.0, 1.0)
@@ -0,0 +1,66 @@
+import numpy as np
+from functools import lru_cache
+
+def trapezoid_weights(x):
+    """Weights w with w @ f == np.trapz(f, x) for samples f on the grid x."""
+    dx = np.diff(x)
+    weights = np.zeros_like(x)
+    weights[:-1] += dx / 2
+    weights[1:] += dx / 2
+    return weights
+
+class Grid:
+    """Spatial grid owning its integration weights and lazily tabulated basis functions.
+
+    Every function of the problem modules that takes a grid x also accepts a
+    Grid: basis tables are then computed once per (basis, size, parameters)
+    and reused, and integrals become a dot product with the stored weights.
+    With dtype=np.float32 the tables are stored in single precision, halving
+    their memory; products with float64 coefficients are still float64.
+    """
+
+    __slots__ = ('x', 'weights', 'dtype', '_tables')
+
+    def __init__(self, x, dtype=np.float64):
+        self.x = np.asarray(x, dtype=float)
+        self.weights = trapezoid_weights(self.x)
+        self.dtype = np.dtype(dtype)
+        self._tables = {}
+
+    def __len__(self):
+        return len(self.x)
+
+    def __repr__(self):
+        return f"Grid({len(self.x)} points on [{self.x[0]:g}, {self.x[-1]:g}], {len(self._tables)} tables, {self.dtype})"
+
+    def table(self, key, compute):
+        """Tabulated values stored under key, computed by compute() on first use."""
+        values = self._tables.get(key)
+        if values is None:
+            values = np.asarray(compute(), dtype=self.dtype)
+            values.setflags(write=False)
+            self._tables[key] = values
+        return values
+
+    def integrate(self, values):
+        """Trapezoid integral of values along their last axis."""
+        return values @ self.weights
+
+    def nbytes(self):
+        """Memory held by the grid, its weights and its tables."""
+        return self.x.nbytes + self.weights.nbytes + sum(t.nbytes for t in self._tables.values())
+
+@lru_cache(maxsize=32)
+def uniform_grid(a, b, n_points):
+    """Shared Grid of n_points equally spaced points on [a, b]; repeated requests reuse its tables."""
+    return Grid(np.linspace(a, b, n_points))
+
+def points(x):
+    """Raw grid points of a Grid or of an array."""
+    return x.x if isinstance(x, Grid) else x
+
+def integrate(values, x):
+    """Trapezoid integral of values along their last axis on a Grid or an array of points."""
+    if isinstance(x, Grid):
+        return x.integrate(values)
+    return np.trapz(values, x, axis=-1)
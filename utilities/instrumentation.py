@@ -0,0 +1,129 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# Per-thread (i.e. per Streamlit session) on/off switch, stage timings and
+# counters of the current capture, and process-wide rolling history of
+# finished captures. Off by default: stage() then returns a shared no-op
+# context manager and count() returns after a single flag test, so
+# instrumented hot paths cost next to nothing unless the calling thread has
+# switched diagnostics on.
+_local = threading.local()
+_history = defaultdict(lambda: deque(maxlen=500))
+_history_lock = threading.Lock()
+_NULL = nullcontext()
+
+def enable():
+    """Switch instrumentation on for the calling thread."""
+    _local.enabled = True
+
+def disable():
+    """Switch instrumentation off for the calling thread."""
+    _local.enabled = False
+
+def enabled():
+    """Whether instrumentation is on in the calling thread."""
+    return getattr(_local, 'enabled', False)
+
+def _current():
+    if not hasattr(_local, 'timings'):
+        _local.timings = defaultdict(float)
+        _local.counters = defaultdict(int)
+    return _local.timings, _local.counters
+
+def reset():
+    """Start a new capture for the calling thread."""
+    _local.timings = defaultdict(float)
+    _local.counters = defaultdict(int)
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _current()[0][self.name] += time.perf_counter() - self.start
+        return False
+
+def stage(name):
+    """Context manager adding the time spent inside it to the named stage."""
+    return _Stage(name) if enabled() else _NULL
+
+def count(name, k=1):
+    """Increment the named call counter."""
+    if enabled():
+        _current()[1][name] += k
+
+def record(name, seconds):
+    """Add an externally measured duration to the named stage."""
+    if enabled():
+        _current()[0][name] += seconds
+
+def timed(name, counter=None):
+    """Decorator timing every call under the named stage and optionally counting it."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            if counter is not None:
+                _current()[1][counter] += 1
+            with _Stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def snapshot(record=True):
+    """Timings and counters of the current capture; with record=True they also enter the rolling history."""
+    timings, counters = _current()
+    result = {'timings': dict(timings), 'counters': dict(counters)}
+    if record:
+        with _history_lock:
+            for name, seconds in timings.items():
+                _history[name].append(seconds)
+    return result
+
+def percentiles(qs=(50, 90, 99)):
+    """Rolling percentiles (seconds) of every stage over the recorded captures."""
+    with _history_lock:
+        samples = {name: sorted(values) for name, values in _history.items() if values}
+    return {name: {q: values[min(len(values) - 1, int(q / 100 * len(values)))] for q in qs}
+            for name, values in samples.items()}
+
+def start_profile():
+    """Start a cProfile capture and return the profiler, or None if another profiler is already active."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler per process
+        return None
+    return profiler
+
+def stop_profile(profiler, sort='cumulative', limit=25):
+    """Stop a capture started with start_profile and return its report as text."""
+    profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+@contextmanager
+def profiled(sort='cumulative', limit=25):
+    """Profile the enclosed block with cProfile; the report is stored under 'report' of the yielded dict."""
+    result = {}
+    profiler = start_profile()
+    try:
+        yield result
+    finally:
+        if profiler is not None:
+            result['report'] = stop_profile(profiler, sort, limit)
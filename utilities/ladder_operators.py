@@ -0,0 +1,116 @@
+import numpy as np
+from config import hbar
+from utilities.instrumentation import timed
+from utilities.exact_diagonalization import banded_eigensystem, symmetric_band_matvec, tridiagonal_eigensystem
+
+# Operators of the oscillator number basis are kept by their diagonals only:
+# x̂ = sqrt(ħ/2mω)(a + a†) is tridiagonal and x̂^k has bandwidth k, so memory
+# and matrix-vector products cost O(k N) instead of O(N²).
+
+class BandedOperator:
+    """Symmetric banded matrix stored by its upper diagonals, bands[p, i] = H[i, i+p].
+
+    Supports H @ v for vectors and stacks of column vectors, which is all
+    rs_series needs, and diagonalization through the banded LAPACK solvers.
+    Entries of bands[p] beyond index N-p-1 are ignored.
+    """
+
+    def __init__(self, bands):
+        self.bands = np.atleast_2d(np.asarray(bands, dtype=float))
+
+    def __len__(self):
+        return self.bands.shape[1]
+
+    @property
+    def shape(self):
+        return (len(self), len(self))
+
+    @property
+    def bandwidth(self):
+        return self.bands.shape[0] - 1
+
+    def __repr__(self):
+        return f"BandedOperator(N={len(self)}, bandwidth={self.bandwidth})"
+
+    def diagonal(self, p=0):
+        return self.bands[p, :len(self) - p]
+
+    def __matmul__(self, v):
+        return symmetric_band_matvec([self.diagonal(p) for p in range(self.bandwidth + 1)], v)
+
+    def __add__(self, other):
+        b = max(self.bandwidth, other.bandwidth)
+        bands = np.zeros((b + 1, len(self)))
+        bands[:self.bandwidth + 1] += self.bands
+        bands[:other.bandwidth + 1] += other.bands
+        return BandedOperator(bands)
+
+    def __mul__(self, c):
+        return BandedOperator(c * self.bands)
+
+    __rmul__ = __mul__
+
+    def plus_diagonal(self, d):
+        """H + diag(d), e.g. the full Hamiltonian H0 + V from the unperturbed spectrum."""
+        bands = self.bands.copy()
+        bands[0] += d
+        return BandedOperator(bands)
+
+    def upper_banded(self):
+        """Upper banded storage ab[b + i - j, j] = H[i, j] used by scipy.linalg.eig_banded."""
+        b, N = self.bandwidth, len(self)
+        ab = np.zeros((b + 1, N))
+        for p in range(b + 1):
+            ab[b - p, p:] = self.diagonal(p)
+        return ab
+
+    def toarray(self):
+        """Dense copy, for small N only."""
+        H = np.diag(self.diagonal())
+        for p in range(1, self.bandwidth + 1):
+            H += np.diag(self.diagonal(p), p) + np.diag(self.diagonal(p), -p)
+        return H
+
+    def eigensystem(self, levels):
+        """Eigenpairs of the given 0-based levels with the tridiagonal or banded solver."""
+        if self.bandwidth <= 1:
+            e = self.diagonal(1) if self.bandwidth else np.zeros(len(self) - 1)
+            return tridiagonal_eigensystem(self.diagonal(), e, levels)
+        return banded_eigensystem(self.upper_banded(), levels)
+
+def x_powers(k_max, N, m, omega, hbar=hbar):
+    """Yield the diagonals of x̂^0..x̂^k_max on the first N number states.
+
+    Each item D has shape (2k+1, N) with D[k + p, i] = <i|x̂^k|i+p>. The
+    powers are formed as x̂ x̂^{k-1} in N + k_max states and then truncated,
+    so every kept element equals that of the untruncated operator.
+    """
+    M = N + k_max
+    s = np.sqrt(hbar / (2*m*omega)) * np.sqrt(np.arange(1, M))
+    up = np.append(s, 0.0)           # <i|x̂|i+1>
+    down = np.insert(s, 0, 0.0)      # <i|x̂|i-1>
+    D = np.ones((1, M))
+    rows, cols = np.arange(N)[None, :], np.arange(-k_max, k_max + 1)[:, None]
+    for k in range(k_max + 1):
+        if k:
+            # (x̂ P)[i, i+r] = <i|x̂|i-1> P[i-1, i+r] + <i|x̂|i+1> P[i+1, i+r]
+            new = np.zeros((D.shape[0] + 2, M))
+            new[:-2, 1:] += down[1:] * D[:, :-1]
+            new[2:, :-1] += up[:-1] * D[:, 1:]
+            D = new
+        kept = D[:, :N]
+        inside = (rows + cols[k_max - k:k_max + k + 1] >= 0) & (rows + cols[k_max - k:k_max + k + 1] < N)
+        yield np.where(inside, kept, 0.0)
+
+@timed('matrix elements', counter='ladder operators')
+def polynomial_operator(coeffs, N, m, omega, hbar=hbar):
+    """<i|Σ_k c_k x̂^k|j> on the first N number states as a BandedOperator of bandwidth deg."""
+    coeffs = np.trim_zeros(np.asarray(coeffs, dtype=float), 'b')
+    if not len(coeffs):
+        coeffs = np.zeros(1)
+    degree = len(coeffs) - 1
+    bands = np.zeros((degree + 1, N))
+    for k, D in enumerate(x_powers(degree, N, m, omega, hbar)):
+        if coeffs[k] != 0:
+            bands[:k + 1] += coeffs[k] * D[k:]
+    return BandedOperator(bands)
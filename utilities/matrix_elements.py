@@ -0,0 +1,159 @@
+import numpy as np
+from numpy.polynomial.legendre import leggauss
+from utilities.instrumentation import timed
+from utilities.disk_cache import cached_array, fingerprint
+from utilities.grid import Grid
+
+def gauss_legendre(a, b, n_nodes):
+    """Gauss-Legendre nodes and weights mapped onto the interval [a, b]."""
+    z, w = leggauss(n_nodes)
+    half = 0.5 * (b - a)
+    return half * z + 0.5 * (a + b), half * w
+
+def quadrature_nodes(n_max):
+    """Number of nodes resolving every product f_m f_n with m, n <= n_max."""
+    return 4 * n_max + 40
+
+@timed('basis evaluation', counter='basis evaluations')
+def _box_basis(n_max, x, L):
+    k = np.arange(1, n_max + 1)[:, None]
+    return np.sqrt(2 / L) * np.sin(k * np.pi * x[None, :] / L)
+
+def box_basis(n_max, x, L, cache=True):
+    """Box eigenfunctions f_1..f_{n_max} tabulated on x, shape (n_max, len(x)).
+
+    cache=False skips the Grid and disk caches, for one-off blocks of a grid.
+    """
+    if isinstance(x, Grid):
+        return x.table(('box basis', n_max, L), lambda: box_basis(n_max, x.x, L))
+    x = np.asarray(x, dtype=float)
+    if not cache:
+        return _box_basis(n_max, x, L)
+    parts = lambda: {'table': 'box basis', 'n_max': n_max, 'L': L, 'x': fingerprint(x)}
+    return cached_array(parts, lambda: _box_basis(n_max, x, L))
+
+def cosine_moments(k_max, p):
+    """Integrals ∫_0^1 u^k cos(p π u) du for k = 0..k_max and integer p, shape (k_max+1,) + p.shape."""
+    p = np.asarray(p)
+    zero = p == 0
+    b = np.where(zero, 1.0, np.pi * p)
+    sign = np.where(p % 2 == 0, 1.0, -1.0)
+    # Integration by parts, using sin(p π) = 0 and cos(p π) = (-1)^p
+    C = np.where(zero, 1.0, 0.0)
+    S = np.where(zero, 0.0, (1.0 - sign) / b)
+    moments = [C]
+    for k in range(1, k_max + 1):
+        C, S = -k * S / b, (k * C - sign) / b
+        C = np.where(zero, 1.0 / (k + 1), C)
+        S = np.where(zero, 0.0, S)
+        moments.append(C)
+    return np.array(moments)
+
+@timed('matrix elements', counter='closed-form matrices')
+def _monomial_matrix(k, L, n_max):
+    idx = np.arange(1, n_max + 1)
+    diff = np.abs(idx[:, None] - idx[None, :])
+    total = idx[:, None] + idx[None, :]
+    # <m|x^k|n> = L^k [J_k(m-n) - J_k(m+n)], J_k(p) = ∫_0^1 u^k cos(p π u) du
+    J = cosine_moments(k, diff)[k] - cosine_moments(k, total)[k]
+    return float(L) ** k * J
+
+def monomial_matrix(k, L, n_max):
+    """Closed-form matrix <f_m|x^k|f_n>, m, n = 1..n_max."""
+    parts = {'matrix': 'box x^k', 'k': k, 'L': L, 'n_max': n_max}
+    return cached_array(parts, lambda: _monomial_matrix(k, L, n_max))
+
+def polynomial_matrix(coeffs, L, n_max):
+    """Closed-form matrix <f_m|Σ_k c_k x^k|f_n>, m, n = 1..n_max."""
+    H = np.zeros((n_max, n_max))
+    for k, c in enumerate(coeffs):
+        if c != 0:
+            H += c * monomial_matrix(k, L, n_max)
+    return H
+
+def quadrature_matrix(V, L, n_max, n_nodes=None):
+    """Matrix <f_m|V|f_n>, m, n = 1..n_max, of a vectorized potential V by Gauss-Legendre quadrature."""
+    if n_nodes is None:
+        n_nodes = quadrature_nodes(n_max)
+    xq, wq = gauss_legendre(0.0, L, n_nodes)
+    # V enters only through its values at the nodes, which key the result
+    values = np.asarray(V(xq), dtype=float)
+    parts = lambda: {'matrix': 'box quadrature', 'L': L, 'n_max': n_max, 'n_nodes': n_nodes, 'V': fingerprint(values)}
+    return cached_array(parts, lambda: _quadrature_matrix(box_basis(n_max, xq, L, cache=False), wq * values))
+
+@timed('matrix elements', counter='quadrature calls')
+def _quadrature_matrix(basis, weights):
+    return (basis * weights) @ basis.T
+
+def transform_samples(n_max):
+    """Default number of sampling intervals of a potential projected through the DCT."""
+    return max(4096, 32 * n_max)
+
+def cosine_coefficients(samples, L):
+    """c_p = (1/L) ∫_0^L V(x) cos(p π x / L) dx, p = 0..M, from M+1 uniform samples of V on [0, L].
+
+    One DCT-I is exactly the trapezoid rule for every p at once; when M is
+    even, Richardson extrapolation against the half grid lifts it to O(h^4)
+    for smooth potentials.
+    """
+    from scipy.fft import dct
+    samples = np.asarray(samples, dtype=float)
+    M = len(samples) - 1
+    c = dct(samples, type=1) / (2 * M)
+    if M % 2 == 0 and M >= 8:
+        half = dct(samples[::2], type=1) / M
+        c[:len(half)] = (4 * c[:len(half)] - half) / 3
+        c = c[:len(half)]
+    return c
+
+def transform_matrix(V, L, n_max, n_samples=None):
+    """Matrix <f_m|V|f_n>, m, n = 1..n_max, of V given as a callable or as uniform samples on [0, L].
+
+    The cosine coefficients of V come from one discrete cosine transform and
+    <f_m|V|f_n> = c_{|m-n|} - c_{m+n}, so the cost is O(M log M) for M
+    samples instead of one quadrature per element.
+    """
+    if callable(V):
+        if n_samples is None:
+            n_samples = transform_samples(n_max)
+        V = V(np.linspace(0.0, L, n_samples + 1))
+    V = np.asarray(V, dtype=float)
+    parts = lambda: {'matrix': 'box transform', 'L': L, 'n_max': n_max, 'V': fingerprint(V)}
+    return cached_array(parts, lambda: _transform_matrix(V, L, n_max))
+
+@timed('matrix elements', counter='transform matrices')
+def _transform_matrix(samples, L, n_max):
+    c = cosine_coefficients(samples, L)
+    if len(c) <= 2 * n_max:
+        raise ValueError(f"{len(samples)} samples give {len(c)} cosine coefficients but {n_max} box states need "
+                         f"more than {2 * n_max}; use at least {4 * n_max + 1} samples")
+    idx = np.arange(1, n_max + 1)
+    return c[np.abs(idx[:, None] - idx[None, :])] - c[idx[:, None] + idx[None, :]]
+
+def perturbation_matrix(V, L, n_max, method=None, n_nodes=None, n_samples=None):
+    """Box-basis matrix of V with the cheapest applicable method.
+
+    V is a tuple of monomial coefficients (closed form), a vectorized
+    callable or a 1-D NumPy array of uniform samples on [0, L] (both through
+    the discrete cosine transform). Any other input, e.g. a list, is
+    ambiguous and needs an explicit method. method='quadrature' forces
+    Gauss-Legendre quadrature of a callable. n_nodes and n_samples tune the
+    quadrature and transform paths.
+    """
+    if method is None:
+        if callable(V):
+            method = 'transform'
+        elif isinstance(V, np.ndarray) and V.ndim == 1:
+            method = 'transform'
+        elif isinstance(V, tuple):
+            method = 'closed form'
+        else:
+            raise ValueError("give monomial coefficients as a tuple, samples as a 1-D array or a callable, "
+                             "or pass method='closed form' or 'transform'")
+    if method == 'closed form':
+        return polynomial_matrix(V, L, n_max)
+    if method == 'transform':
+        return transform_matrix(V, L, n_max, n_samples)
+    if method == 'quadrature':
+        return quadrature_matrix(V, L, n_max, n_nodes)
+    raise ValueError(f"unknown method '{method}'")
@@ -0,0 +1,171 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+# Grid axes of each problem. The perturbation strength varies fastest, so a
+# chunk mostly shares the remaining parameters and a worker evaluates it from
+# one cached unit-strength series.
+PARAMETERS = {
+    'well': ('L', 'n', 'epsilon'),
+    'charged': ('L', 'n', 'q', 'E_field'),
+    'oscillator': ('m', 'omega', 'n', 'epsilon'),
+}
+
+def grid_points(problem, grid):
+    """Cartesian product of the grid values as one column per parameter."""
+    names = PARAMETERS[problem]
+    missing = [name for name in names if name not in grid]
+    if missing:
+        raise ValueError(f"grid for '{problem}' lacks {', '.join(missing)}")
+    axes = [np.atleast_1d(grid[name]) for name in names]
+    mesh = np.meshgrid(*axes, indexing='ij')
+    return {name: values.ravel() for name, values in zip(names, mesh)}
+
+def _series_groups(keys):
+    """Split the rows of keys into groups sharing identical values."""
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    return [(key, np.flatnonzero(inverse.ravel() == i)) for i, key in enumerate(unique)]
+
+def evaluate(problem, order, columns):
+    """Energy corrections E^(0..order), shape (len, order+1), of a block of grid points."""
+    from utilities.rayleigh_schrodinger import sweep
+    n_points = len(columns['n'])
+    energies = np.empty((n_points, order + 1))
+    if problem == 'well':
+        import utilities.perturbed_potential_well_utilities as well
+        for (L, n), rows in _series_groups(np.column_stack([columns['L'], columns['n']])):
+            E, C = well.unit_series(int(n), float(L), order)
+            energies[rows] = sweep(E, C, columns['epsilon'][rows])[0]
+    elif problem == 'charged':
+        import utilities.perturbed_charged_particle as char
+        for (L, n), rows in _series_groups(np.column_stack([columns['L'], columns['n']])):
+            E, C = char.unit_series(int(n), float(L), order)
+            energies[rows] = sweep(E, C, columns['q'][rows] * columns['E_field'][rows])[0]
+    elif problem == 'oscillator':
+        import utilities.perturbed_harmonic_oscillator as harm
+        keys = np.column_stack([columns['m'], columns['omega'], columns['n']])
+        for (m, omega, n), rows in _series_groups(keys):
+            E, C = harm.unit_series(int(n), float(m), float(omega), order=order)
+            energies[rows] = sweep(E, C, columns['epsilon'][rows])[0]
+    else:
+        raise ValueError(f"unknown problem '{problem}'")
+    return energies
+
+def wavefunctions(problem, order, columns, n_points):
+    """Grids and normalized corrected wavefunctions, both shape (len, n_points), of a block of grid points.
+
+    The grid spans the box [0, L], or ±4 oscillator lengths around the
+    origin, as in the app.
+    """
+    from config import hbar
+    size = len(columns['n'])
+    x = np.empty((size, n_points))
+    psi = np.empty((size, n_points))
+    if problem == 'well':
+        import utilities.perturbed_potential_well_utilities as well
+        for (L, n), rows in _series_groups(np.column_stack([columns['L'], columns['n']])):
+            x[rows] = grid = np.linspace(0, L, n_points)
+            psi[rows] = well.epsilon_sweep(grid, float(L), columns['epsilon'][rows], int(n), order)[1]
+    elif problem == 'charged':
+        import utilities.perturbed_charged_particle as char
+        for (L, n), rows in _series_groups(np.column_stack([columns['L'], columns['n']])):
+            x[rows] = grid = np.linspace(0, L, n_points)
+            fields = columns['q'][rows] * columns['E_field'][rows]
+            psi[rows] = char.field_sweep(grid, float(L), fields, int(n), 1.0, order)[1]
+    elif problem == 'oscillator':
+        import utilities.perturbed_harmonic_oscillator as harm
+        keys = np.column_stack([columns['m'], columns['omega'], columns['n']])
+        for (m, omega, n), rows in _series_groups(keys):
+            a = np.sqrt(hbar / (m * omega))
+            x[rows] = grid = np.linspace(-4 * a, 4 * a, n_points)
+            psi[rows] = harm.epsilon_sweep(grid, columns['epsilon'][rows], int(n), float(m), float(omega), hbar, order)[1]
+    else:
+        raise ValueError(f"unknown problem '{problem}'")
+    return x, psi
+
+def _evaluate_chunk(problem, order, columns, n_points):
+    """evaluate() plus, with n_points, the wavefunctions() of the same block (else None, None)."""
+    E = evaluate(problem, order, columns)
+    return (E,) + (wavefunctions(problem, order, columns, n_points) if n_points else (None, None))
+
+def _init_worker(problem):
+    # Import the problem module once per worker; its matrix and series caches
+    # then persist across every chunk the worker receives.
+    evaluate(problem, 0, {name: np.ones(1) for name in PARAMETERS[problem]})
+
+def _open_columns(out_dir, problem, grid, order, chunk_size, n_points=0):
+    """Create the column files of a new study, or reopen those of a matching partial one.
+
+    Returns the writable E, x and psi columns (x and psi are None without
+    n_points), done and the grid points.
+    """
+    spec = {'problem': problem, 'order': order, 'chunk_size': chunk_size,
+            'grid': {name: np.atleast_1d(grid[name]).tolist() for name in PARAMETERS[problem]}}
+    if n_points:
+        # Only studies with wavefunctions record it, so older specs still match
+        spec['n_points'] = n_points
+    spec_path = os.path.join(out_dir, 'spec.json')
+    points = grid_points(problem, grid)
+    size = len(points['n'])
+    n_chunks = -(-size // chunk_size)
+    shapes = {'E': (size, order + 1), 'done': (n_chunks,)}
+    if n_points:
+        shapes.update(x=(size, n_points), psi=(size, n_points))
+    if os.path.exists(spec_path):
+        with open(spec_path) as f:
+            if json.load(f) != spec:
+                raise ValueError(f"{out_dir} holds a different study; use a new directory")
+        columns = {name: np.load(os.path.join(out_dir, f'{name}.npy'), mmap_mode='r+') for name in shapes}
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        for name, values in points.items():
+            np.save(os.path.join(out_dir, f'{name}.npy'), values)
+        columns = {name: np.lib.format.open_memmap(os.path.join(out_dir, f'{name}.npy'), mode='w+',
+                                                   dtype=bool if name == 'done' else float, shape=shape)
+                   for name, shape in shapes.items()}
+        # The spec goes last: a directory without it is an aborted setup
+        with open(spec_path, 'w') as f:
+            json.dump(spec, f)
+    return columns['E'], columns.get('x'), columns.get('psi'), columns['done'], points
+
+def run_study(problem, grid, out_dir, order=2, chunk_size=4096, workers=None, n_points=0):
+    """Evaluate E^(0..order) on every point of a parameter grid across a process pool.
+
+    grid maps each name of PARAMETERS[problem] to a value or a sequence of
+    values. Results are written chunk by chunk into memory-mappable columns
+    in out_dir: one .npy per parameter, E.npy of shape (points, order+1) and
+    done.npy marking finished chunks. With n_points, x.npy and psi.npy of
+    shape (points, n_points) also hold the grids and normalized corrected
+    wavefunctions of wavefunctions(). Running again on the same directory
+    resumes a partially completed study. Returns load_study(out_dir).
+    """
+    energies, x, psi, done, points = _open_columns(out_dir, problem, grid, order, chunk_size, n_points)
+    pending = np.flatnonzero(~done)
+    if len(pending):
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(problem,)) as pool:
+            futures = {}
+            for chunk in pending:
+                block = slice(chunk * chunk_size, (chunk + 1) * chunk_size)
+                columns = {name: values[block] for name, values in points.items()}
+                futures[pool.submit(_evaluate_chunk, problem, order, columns, n_points)] = chunk
+            for future in as_completed(futures):
+                chunk = futures[future]
+                block = slice(chunk * chunk_size, (chunk + 1) * chunk_size)
+                E, x_block, psi_block = future.result()
+                energies[block] = E
+                energies.flush()
+                if n_points:
+                    x[block] = x_block
+                    psi[block] = psi_block
+                    x.flush()
+                    psi.flush()
+                # Marked only after its results are on disk
+                done[chunk] = True
+                done.flush()
+    return load_study(out_dir)
+
+def load_study(out_dir):
+    """Memory-mapped columns of a study directory, keyed by parameter name plus 'E' and 'done'."""
+    names = [name[:-4] for name in os.listdir(out_dir) if name.endswith('.npy')]
+    return {name: np.load(os.path.join(out_dir, f'{name}.npy'), mmap_mode='r') for name in names}
@@ -1,53 +1,128 @@
 import numpy as np
-from scipy.integrate import quad
-from config import *
+from functools import lru_cache
+from config import max_states
 from utilities.unperturbed_charged_particle import *
+from utilities.instrumentation import stage
+from utilities.grid import integrate
+from utilities.matrix_elements import box_basis, perturbation_matrix
+from utilities.exact_diagonalization import eigensystem, align_phase
+from utilities.time_evolution import evolve, evolve_chunks
+from utilities.synthesis import synthesize
+from utilities.wavefunction import box_state
+from utilities.scaling import box_coupling, box_energy_scale, dimensionless_series, scaled_series
+from utilities.rayleigh_schrodinger import adaptive_series, rs_series_all, normalized_states, normalize, sweep
 
 def V_prime(x, q, E_field):
     """Perturbing potential: uniform electric field."""
     return -q * E_field * x
 
+def V_prime_coefficients(q, E_field):
+    """Monomial coefficients of V', read by the closed-form matrix elements."""
+    return (0.0, -q * E_field)
+
+@lru_cache(maxsize=32)
+def H_prime_matrix(q, E_field, L, n_max=max_states):
+    """Perturbation matrix <m|V'|n> for m, n = 1..n_max (read-only, cached)."""
+    H = perturbation_matrix(V_prime_coefficients(q, E_field), L, n_max)
+    H.setflags(write=False)
+    return H
+
 def H_prime_mn(m, n, q, E_field, L):
     """Matrix element of the perturbation between states m and n."""
-    def integrand(x):
-        return f_n(n, x, L) * V_prime(x, q, E_field) * f_n(m, x, L)
-    result, _ = quad(integrand, 0, L)
-    return result
+    return H_prime_matrix(q, E_field, L, max(m, n, max_states))[m - 1, n - 1]
 
 def first_order_correction(n, q, E_field, L):
     """First-order correction (expected to vanish by symmetry)."""
     return H_prime_mn(n, n, q, E_field, L)
 
+def perturbation_series(n, q, E_field, L, order=2):
+    """E^(0..order) and sine-basis coefficients of ψ^(0..order) for level n, scaled from the series of u."""
+    n_max = max(n, max_states)
+    E, C = dimensionless_series('box', 1, n, order, n_max)
+    return scaled_series(E, C, box_coupling(-q * E_field, 1, L), box_energy_scale(L))
+
+def state_corrections(n, q, E_field, L, order=2):
+    """E^(0..order) and ψ^(0..order) as lazy coefficient-space states (Wavefunction)."""
+    E, C = perturbation_series(n, q, E_field, L, order)
+    return E, [box_state(c, L) for c in C]
+
 def Psi_1_prime(x, n, q, E_field, L):
     """First-order correction to the wavefunction."""
-    correction = np.zeros_like(x)
-    E_n0 = E_n(n,L)
-    for m in range(1, max_states + 1):  
-        if m == n:
-            continue
-        E_m0 = E_n(m, L)
-        coeff = H_prime_mn(m, n, q, E_field, L) / (E_n0 - E_m0)
-        correction += coeff * f_n(m, x, L)
-    return correction
+    _, states = state_corrections(n, q, E_field, L, order=1)
+    return states[1].evaluate(x)
 
 def second_order_correction(n, q, E_field, L):
     """Second-order correction to the energy."""
-    correction = 0
-    E_n0 = E_n(n, L)
-    for m in range(1, max_states + 1):
-        if m == n:
-            continue
-        H_prime_mn_value = H_prime_mn(m, n, q, E_field, L)
-        correction += (abs(H_prime_mn_value)**2) / (E_n0 - E_n(m,L))
-    return correction
+    E, _ = perturbation_series(n, q, E_field, L, order=2)
+    return E[2]
 
 def energy_and_wavefunctions_corrections(x, L, n=1, q=1.0, E_field=0.1):
     """Compute unperturbed and perturbed energies/wavefunctions."""
-    psi_0 = f_n(n, x, L)  
-    psi_1 = Psi_1_prime(x, n, q, E_field, L)  
-    psi_total = psi_0 + psi_1  
-    psi_total /= np.sqrt(np.trapz(psi_total**2, x))
-    E0 = E_n(n, L)
-    E1 = first_order_correction(n, q, E_field, L)
-    E2 = second_order_correction(n, q, E_field, L)
+    (E0, E1, E2), C = perturbation_series(n, q, E_field, L, order=2)
+    psi_0, psi_1 = C[:2] @ box_basis(C.shape[1], x, L)
+    psi_total = psi_0 + psi_1
+    with stage('normalization'):
+        psi_total /= np.sqrt(integrate(psi_total**2, x))
     return E0, E1, E2, psi_0, psi_1, psi_total
+
+def spectrum_corrections(L, q=1.0, E_field=0.1, n_levels=max_states, order=2, x=None):
+    """E^(0..order) of levels 1..n_levels, shape (order+1, n_levels), plus normalized wavefunctions if x is given."""
+    n_max = max(n_levels, max_states)
+    E0 = E_n(np.arange(1, n_max + 1), L)
+    energies, C = rs_series_all(E0, H_prime_matrix(q, E_field, L, n_max), order)
+    if x is None:
+        return energies[:, :n_levels]
+    psi = normalized_states(C, box_basis(n_max, x, L), x, n_levels)
+    return energies[:, :n_levels], psi
+
+@lru_cache(maxsize=64)
+def unit_series(n, L, order=2):
+    """Field-independent series coefficients, i.e. the series at q·E_field = 1."""
+    E, C = perturbation_series(n, 1.0, 1.0, L, order)
+    E.setflags(write=False)
+    C.setflags(write=False)
+    return E, C
+
+def field_sweep(x, L, E_fields, n=1, q=1.0, order=2):
+    """Corrections, shape (len(E_fields), order+1), and normalized wavefunctions, shape (len(E_fields), len(x))."""
+    E, C = unit_series(n, L, order)
+    energies, coeffs = sweep(E, C, q * np.asarray(E_fields, dtype=float))
+    return energies, normalize(coeffs @ box_basis(C.shape[1], x, L), x)
+
+def exact_corrections(x, L, n=1, q=1.0, E_field=0.1, n_basis=None):
+    """energy_and_wavefunctions_corrections plus the exact E_n and ψ_n in n_basis box states."""
+    if n_basis is None:
+        n_basis = 4 * max(n, max_states)
+    H = np.diag(E_n(np.arange(1, n_basis + 1), L)) + H_prime_matrix(q, E_field, L, n_basis)
+    E, v, _ = eigensystem(H, n - 1)
+    psi = align_phase(v, [n - 1])[:, 0] @ box_basis(n_basis, x, L)
+    return energy_and_wavefunctions_corrections(x, L, n, q, E_field) + (E[0], psi)
+
+def corrected_levels(x, L, n_states, q=1.0, E_field=0.1, order=2):
+    """Perturbed energies and normalized corrected wavefunctions of the levels in n_states."""
+    idx = np.asarray(n_states) - 1
+    energies, psi = spectrum_corrections(L, q, E_field, max(n_states), order, x)
+    return energies.sum(axis=0)[idx], psi[idx]
+
+def Psi_mixed_prime(x, t, L, coeffs, n_states, q=1.0, E_field=0.1, order=2):
+    """Superposition of perturbed eigenstates evolved with the perturbed energies."""
+    energies, psi = corrected_levels(x, L, n_states, q, E_field, order)
+    frames = evolve(psi, energies, coeffs, t)
+    return frames if np.ndim(t) else frames[0]
+
+def Psi_mixed_prime_chunks(x, t, L, coeffs, n_states, q=1.0, E_field=0.1, order=2, chunk_size=None, max_bytes=64 * 2**20):
+    """Generator of (t_chunk, Ψ'_chunk) blocks of Psi_mixed_prime."""
+    energies, psi = corrected_levels(x, L, n_states, q, E_field, order)
+    return evolve_chunks(psi, energies, coeffs, t, chunk_size=chunk_size, max_bytes=max_bytes)
+
+def adaptive_corrections(n, q, E_field, L, order=2, tol=1e-10, max_size=2000):
+    """perturbation_series with the basis grown until every E^(k) is stable to tol; also returns the error estimate and basis size."""
+    return adaptive_series(lambda N: E_n(np.arange(1, N + 1), L),
+                           lambda N: perturbation_matrix(V_prime_coefficients(q, E_field), L, N),
+                           n - 1, order, tol, max_size=max_size)
+
+def corrected_wavefunction(x, L, n=1, q=1.0, E_field=0.1, order=2, out=None, chunk_size=None, max_bytes=64 * 2**20):
+    """Normalized Σ_k ψ^(k) synthesized block by block; x may be (start, stop, num) and out a .npy path."""
+    _, C = perturbation_series(n, q, E_field, L, order)
+    return synthesize(C.sum(axis=0), lambda xb: box_basis(C.shape[1], xb, L, cache=False), x, out,
+                      chunk_size=chunk_size, max_bytes=max_bytes)
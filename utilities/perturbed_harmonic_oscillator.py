@@ -1,12 +1,16 @@
 import numpy as np
-import math
-from numpy.polynomial.hermite import hermval
-from config import *
+from functools import lru_cache
+from config import hbar, max_states
 from utilities.unperturbed_harmonic_oscillator import *
-
-def first_order_correction(n, epsilon, m, omega, hbar=hbar):
-    """First-order correction to the energy (vanishes for V'=εx)."""
-    return 0.0
+from utilities.instrumentation import stage
+from utilities.grid import integrate
+from utilities.exact_diagonalization import align_phase
+from utilities.ladder_operators import polynomial_operator
+from utilities.time_evolution import evolve, evolve_chunks
+from utilities.synthesis import synthesize
+from utilities.wavefunction import oscillator_state
+from utilities.scaling import oscillator_coupling, dimensionless_series, scaled_series
+from utilities.rayleigh_schrodinger import rs_series, rs_series_all, normalized_states, normalize, sweep
 
 def matrix_element_x(n, m_, m, omega, hbar=hbar):
     """<m|x|n> analytic formula for HO."""
@@ -17,42 +21,127 @@ def matrix_element_x(n, m_, m, omega, hbar=hbar):
     else:
         return 0.0
 
-def second_order_correction(n, epsilon, m, omega, hbar=hbar):
-    """Second-order energy correction (constant, independent of n)."""
-    # From analytic derivation: ΔE_n^(2) = -ε^2 / (2 m ω^2)
-    return - (epsilon**2) / (2.0*m*omega**2)
+def x_matrix(N, m, omega, hbar=hbar):
+    """<k|x|j> for k, j = 0..N-1 (tridiagonal in the number basis)."""
+    off = np.sqrt(hbar/(2*m*omega)) * np.sqrt(np.arange(1, N))
+    return np.diag(off, 1) + np.diag(off, -1)
 
-def Psi_1_prime(x, n, epsilon, m, omega, hbar=hbar):
-    """First-order correction to wavefunction for V'=εx (mixes n±1)."""
-    E0 = E_n(n, m, omega, hbar)
-    correction = np.zeros_like(x, dtype=float)
+def polynomial_series(n, coeffs, m, omega, hbar=hbar, order=2, n_basis=None):
+    """E^(0..order) and number-basis coefficients of ψ^(0..order) for V'=Σ_k c_k x^k."""
+    # x^k couples n to n±k at most, so states 0..n+degree*order make the
+    # series exact; V' is applied as a banded operator, O(degree * n_basis)
+    if n_basis is None:
+        n_basis = n + (len(coeffs) - 1) * order + 1
+    E0 = E_n(np.arange(n_basis), m, omega, hbar)
+    return rs_series(E0, polynomial_operator(coeffs, n_basis, m, omega, hbar), n, order)
 
-    # n+1 contribution
-    denom_up = E0 - E_n(n+1, m, omega, hbar)   # = -ħω
-    coeff_up = (epsilon * matrix_element_x(n, n+1, m, omega, hbar)) / denom_up
-    correction += coeff_up * f_n(n+1, x, m, omega, hbar)
+def perturbation_series(n, epsilon, m, omega, hbar=hbar, order=2):
+    """E^(0..order) and number-basis coefficients of ψ^(0..order) for V'=εx, scaled from the series of ξ."""
+    E, C = dimensionless_series('oscillator', 1, n, order, n + order + 1)
+    return scaled_series(E, C, oscillator_coupling(epsilon, 1, m, omega, hbar), hbar * omega)
 
-    # n-1 contribution
-    if n > 0:
-        denom_dn = E0 - E_n(n-1, m, omega, hbar)   # = +ħω
-        coeff_dn = (epsilon * matrix_element_x(n, n-1, m, omega, hbar)) / denom_dn
-        correction += coeff_dn * f_n(n-1, x, m, omega, hbar)
+def first_order_correction(n, epsilon, m, omega, hbar=hbar):
+    """First-order correction to the energy (vanishes for V'=εx)."""
+    E, _ = perturbation_series(n, epsilon, m, omega, hbar, order=1)
+    return E[1]
+
+def second_order_correction(n, epsilon, m, omega, hbar=hbar):
+    """Second-order energy correction, -ε^2 / (2 m ω^2) independently of n."""
+    E, _ = perturbation_series(n, epsilon, m, omega, hbar, order=2)
+    return E[2]
 
-    return correction
+def state_corrections(n, epsilon, m, omega, hbar=hbar, order=2):
+    """E^(0..order) and ψ^(0..order) as lazy coefficient-space states (Wavefunction)."""
+    E, C = perturbation_series(n, epsilon, m, omega, hbar, order)
+    return E, [oscillator_state(c, m, omega, hbar) for c in C]
+
+def Psi_1_prime(x, n, epsilon, m, omega, hbar=hbar):
+    """First-order correction to wavefunction for V'=εx (mixes n±1)."""
+    _, states = state_corrections(n, epsilon, m, omega, hbar, order=1)
+    return states[1].evaluate(x)
 
 def energy_and_wavefunctions_corrections(x, n, epsilon, m, omega, hbar=hbar):
     """Return E0, E1, E2 and ψ^(0), ψ^(1), ψ^(0)+ψ^(1) for plotting."""
-    psi_0 = f_n(n, x, m, omega, hbar)
-    psi_1 = Psi_1_prime(x, n, epsilon, m, omega, hbar)
+    (E0, E1, E2), C = perturbation_series(n, epsilon, m, omega, hbar, order=2)
+    psi_0, psi_1 = C[:2] @ hermite_functions(C.shape[1] - 1, x, m, omega, hbar)
     psi_total = psi_0 + psi_1
     # Normalize corrected wavefunction
-    norm = np.sqrt(np.trapz(np.abs(psi_total)**2, x))
-    if norm > 0:
-        psi_total /= norm
-
-    E0 = E_n(n, m, omega, hbar)
-    E1 = first_order_correction(n, epsilon, m, omega, hbar)
-    E2 = second_order_correction(n, epsilon, m, omega, hbar)
+    with stage('normalization'):
+        norm = np.sqrt(integrate(np.abs(psi_total)**2, x))
+        if norm > 0:
+            psi_total /= norm
 
     return E0, E1, E2, psi_0, psi_1, psi_total
 
+def spectrum_corrections(epsilon, m, omega, hbar=hbar, n_levels=max_states, order=2, x=None):
+    """E^(0..order) of levels 0..n_levels-1, shape (order+1, n_levels), plus normalized wavefunctions if x is given."""
+    # Levels below n_levels reach at most state n_levels-1+order
+    N = n_levels + order
+    E0 = E_n(np.arange(N), m, omega, hbar)
+    energies, C = rs_series_all(E0, epsilon * x_matrix(N, m, omega, hbar), order)
+    if x is None:
+        return energies[:, :n_levels]
+    psi = normalized_states(C, hermite_functions(N - 1, x, m, omega, hbar), x, n_levels)
+    return energies[:, :n_levels], psi
+
+@lru_cache(maxsize=64)
+def unit_series(n, m, omega, hbar=hbar, order=2):
+    """ε-independent series coefficients, i.e. the series at ε = 1."""
+    E, C = perturbation_series(n, 1.0, m, omega, hbar, order)
+    E.setflags(write=False)
+    C.setflags(write=False)
+    return E, C
+
+def epsilon_sweep(x, epsilons, n, m, omega, hbar=hbar, order=2):
+    """Corrections, shape (len(epsilons), order+1), and normalized wavefunctions, shape (len(epsilons), len(x))."""
+    E, C = unit_series(n, m, omega, hbar, order)
+    energies, coeffs = sweep(E, C, epsilons)
+    return energies, normalize(coeffs @ hermite_functions(C.shape[1] - 1, x, m, omega, hbar), x)
+
+def exact_corrections(x, n, epsilon, m, omega, hbar=hbar, n_basis=None):
+    """energy_and_wavefunctions_corrections plus the exact E_n and ψ_n in n_basis number states."""
+    if n_basis is None:
+        n_basis = 4 * max(n + 1, max_states)
+    # H0 + εx is tridiagonal in the number basis: O(n_basis) eigensolve
+    E, psi = polynomial_exact(x, n, (0.0, epsilon), m, omega, hbar, n_basis)
+    return energy_and_wavefunctions_corrections(x, n, epsilon, m, omega, hbar) + (E, psi)
+
+def polynomial_exact(x, n, coeffs, m, omega, hbar=hbar, n_basis=None):
+    """Exact E_n and ψ_n of H0 + Σ_k c_k x^k in n_basis number states (banded eigensolver)."""
+    if n_basis is None:
+        n_basis = 4 * max(n + 1, max_states)
+    H = polynomial_operator(coeffs, n_basis, m, omega, hbar).plus_diagonal(E_n(np.arange(n_basis), m, omega, hbar))
+    E, v = H.eigensystem(n)
+    v = align_phase(v, [n])[:, 0]
+    # Only the states carrying weight are tabulated, so a large basis costs no large table
+    used = np.flatnonzero(np.abs(v) > 1e-15 * np.abs(v).max())[-1] + 1
+    return E[0], v[:used] @ hermite_functions(used - 1, x, m, omega, hbar)
+
+def polynomial_corrections(x, n, coeffs, m, omega, hbar=hbar, order=2, n_basis=None):
+    """E^(0..order), ψ^(0..order) on x and the normalized corrected state for V'=Σ_k c_k x^k."""
+    energies, C = polynomial_series(n, coeffs, m, omega, hbar, order, n_basis)
+    psi = C @ hermite_functions(C.shape[1] - 1, x, m, omega, hbar)
+    return energies, psi, normalize(psi.sum(axis=0), x)
+
+def corrected_levels(x, n_states, epsilon, m, omega, hbar=hbar, order=2):
+    """Perturbed energies and normalized corrected wavefunctions of the levels in n_states."""
+    idx = np.asarray(n_states)
+    energies, psi = spectrum_corrections(epsilon, m, omega, hbar, max(n_states) + 1, order, x)
+    return energies.sum(axis=0)[idx], psi[idx]
+
+def Psi_mixed_prime(x, t, coeffs, n_states, epsilon, m, omega, hbar=hbar, order=2):
+    """Superposition of perturbed eigenstates evolved with the perturbed energies."""
+    energies, psi = corrected_levels(x, n_states, epsilon, m, omega, hbar, order)
+    frames = evolve(psi, energies, coeffs, t, hbar)
+    return frames if np.ndim(t) else frames[0]
+
+def Psi_mixed_prime_chunks(x, t, coeffs, n_states, epsilon, m, omega, hbar=hbar, order=2, chunk_size=None, max_bytes=64 * 2**20):
+    """Generator of (t_chunk, Ψ'_chunk) blocks of Psi_mixed_prime."""
+    energies, psi = corrected_levels(x, n_states, epsilon, m, omega, hbar, order)
+    return evolve_chunks(psi, energies, coeffs, t, hbar, chunk_size=chunk_size, max_bytes=max_bytes)
+
+def corrected_wavefunction(x, n, epsilon, m, omega, hbar=hbar, order=2, out=None, chunk_size=None, max_bytes=64 * 2**20):
+    """Normalized Σ_k ψ^(k) synthesized block by block; x may be (start, stop, num) and out a .npy path."""
+    _, C = perturbation_series(n, epsilon, m, omega, hbar, order)
+    return synthesize(C.sum(axis=0), lambda xb: hermite_functions(C.shape[1] - 1, xb, m, omega, hbar, cache=False), x, out,
+                      chunk_size=chunk_size, max_bytes=max_bytes)
@@ -1,64 +1,148 @@
 import numpy as np
-from scipy.integrate import quad
-from config import *
+from functools import lru_cache
+from config import max_states
 from utilities.unperturbed_potential_well_utilities import *
+from utilities.instrumentation import stage
+from utilities.grid import integrate
+from utilities.matrix_elements import box_basis, perturbation_matrix
+from utilities.exact_diagonalization import eigensystem, align_phase
+from utilities.time_evolution import evolve, evolve_chunks
+from utilities.synthesis import synthesize
+from utilities.wavefunction import box_state
+from utilities.scaling import box_coupling, box_energy_scale, dimensionless_series, scaled_series
+from utilities.rayleigh_schrodinger import adaptive_series, rs_series, rs_series_all, normalized_states, normalize, sweep
 
 def V_prime(x, epsilon):
     return epsilon * x**2
 
+def V_prime_coefficients(epsilon):
+    # Monomial coefficients of V', read by the closed-form matrix elements
+    return (0.0, 0.0, epsilon)
+
+@lru_cache(maxsize=32)
+def H_prime_matrix(epsilon, L, n_max=max_states):
+    H = perturbation_matrix(V_prime_coefficients(epsilon), L, n_max)
+    H.setflags(write=False)
+    return H
+
 def H_prime_mn(m, n, epsilon, L):
-    def integrand(x):
-        return f_n(x, n, L) * V_prime(x, epsilon) * f_n(x, m, L)
-    result, _ = quad(integrand, 0, L)
-    return result
+    return H_prime_matrix(epsilon, L, max(m, n, max_states))[m - 1, n - 1]
 
 def first_order_correction(n, epsilon, L):
     return H_prime_mn(n, n, epsilon, L)
 
+def perturbation_series(n, epsilon, L, order=2):
+    # E^(0..order) and sine-basis coefficients of ψ^(0..order) for level n,
+    # scaled from one dimensionless series of u² shared by every L and ε
+    n_max = max(n, max_states)
+    E, C = dimensionless_series('box', 2, n, order, n_max)
+    return scaled_series(E, C, box_coupling(epsilon, 2, L), box_energy_scale(L))
+
+def state_corrections(n, epsilon, L, order=2):
+    # E^(0..order) and ψ^(0..order) as lazy coefficient-space states: sums,
+    # norms and overlaps need no grid, values come from evaluate(x)
+    E, C = perturbation_series(n, epsilon, L, order)
+    return E, [box_state(c, L) for c in C]
+
 def Psi_1_prime(x, n, epsilon, L):
-    correction = np.zeros_like(x)
-    E_n0 = E_n(n,L)
-    for m in range(1, max_states + 1):  
-        if m == n:
-            continue
-        E_m0 = E_n(m, L)
-        coeff = H_prime_mn(m, n, epsilon, L) / (E_n0 - E_m0)
-        correction += coeff * f_n(x, m, L)
-    return correction
+    _, states = state_corrections(n, epsilon, L, order=1)
+    return states[1].evaluate(x)
 
 def second_order_correction(n, epsilon, L):
-    correction = 0
-    E_n0 = E_n(n, L)
-    for m in range(1, max_states + 1):
-        if m == n:
-            continue
-        H_prime_mn_value = H_prime_mn(m, n, epsilon, L)
-        correction += (abs(H_prime_mn_value)**2) / (E_n0 - E_n(m,L))
-    return correction
+    E, _ = perturbation_series(n, epsilon, L, order=2)
+    return E[2]
 
 def Psi_2_prime(x, n, epsilon, L):
-    correction = np.zeros_like(x)
-    E_n0 = E_n(n, L)
-    for m in range(1, max_states + 1): 
-        if m == n:
-            continue
-        E_m0 = E_n(m, L)
-        coeff_mn = H_prime_mn(m, n, epsilon, L) / (E_n0 - E_m0)
-        for k in range(1, max_states + 1):  
-            if k == m:
-                continue
-            E_k0 = E_n(k, L)
-            coeff_mk = H_prime_mn(k, m, epsilon, L) / (E_m0 - E_k0)
-            correction += coeff_mn * coeff_mk * f_n(x, k, L)
-    return correction
+    _, states = state_corrections(n, epsilon, L, order=2)
+    return states[2].evaluate(x)
 
 def energy_and_wavefunctions_corrections(x, L, epsilon=0.1, n=1):
-    psi_0 = f_n(x, n, L)  
-    psi_1 = Psi_1_prime(x, n, epsilon, L)  
-    psi_2 = Psi_2_prime(x, n, epsilon, L)  
-    psi_total = psi_0 + psi_1 + psi_2  
-    psi_total /= np.sqrt(np.trapz(psi_total**2, x))
-    E0 = E_n(n, L)
-    E1 = first_order_correction(n, epsilon, L)
-    E2 = second_order_correction(n, epsilon, L)
+    (E0, E1, E2), C = perturbation_series(n, epsilon, L, order=2)
+    psi_0, psi_1, psi_2 = C @ box_basis(C.shape[1], x, L)
+    psi_total = psi_0 + psi_1 + psi_2
+    with stage('normalization'):
+        psi_total /= np.sqrt(integrate(psi_total**2, x))
     return E0, E1, E2, psi_0, psi_1, psi_2, psi_total
+
+def spectrum_corrections(L, epsilon=0.1, n_levels=max_states, order=2, x=None):
+    # E^(0..order) of levels 1..n_levels, shape (order+1, n_levels), from one
+    # matrix build; with a grid x also the normalized corrected wavefunctions
+    n_max = max(n_levels, max_states)
+    E0 = E_n(np.arange(1, n_max + 1), L)
+    energies, C = rs_series_all(E0, H_prime_matrix(epsilon, L, n_max), order)
+    if x is None:
+        return energies[:, :n_levels]
+    psi = normalized_states(C, box_basis(n_max, x, L), x, n_levels)
+    return energies[:, :n_levels], psi
+
+@lru_cache(maxsize=64)
+def unit_series(n, L, order=2):
+    # ε-independent series coefficients, i.e. the series at ε = 1
+    E, C = perturbation_series(n, 1.0, L, order)
+    E.setflags(write=False)
+    C.setflags(write=False)
+    return E, C
+
+def epsilon_sweep(x, L, epsilons, n=1, order=2):
+    # Corrections E^(0..order), shape (len(epsilons), order+1), and normalized
+    # corrected wavefunctions, shape (len(epsilons), len(x)), for every ε
+    E, C = unit_series(n, L, order)
+    energies, coeffs = sweep(E, C, epsilons)
+    return energies, normalize(coeffs @ box_basis(C.shape[1], x, L), x)
+
+def exact_corrections(x, L, epsilon=0.1, n=1, n_basis=None):
+    # energy_and_wavefunctions_corrections plus the exact E_n and ψ_n of
+    # H0 + V' in the first n_basis box states (default 4 * max(n, max_states))
+    if n_basis is None:
+        n_basis = 4 * max(n, max_states)
+    H = np.diag(E_n(np.arange(1, n_basis + 1), L)) + H_prime_matrix(epsilon, L, n_basis)
+    E, v, _ = eigensystem(H, n - 1)
+    psi = align_phase(v, [n - 1])[:, 0] @ box_basis(n_basis, x, L)
+    return energy_and_wavefunctions_corrections(x, L, epsilon, n) + (E[0], psi)
+
+def corrected_levels(x, L, n_states, epsilon=0.1, order=2):
+    # Perturbed energies Σ_k E^(k) and normalized corrected wavefunctions of
+    # the levels in n_states, from a single spectrum_corrections call
+    idx = np.asarray(n_states) - 1
+    energies, psi = spectrum_corrections(L, epsilon, max(n_states), order, x)
+    return energies.sum(axis=0)[idx], psi[idx]
+
+def Psi_mixed_prime(x, t, L, coeffs, n_states, epsilon=0.1, order=2):
+    # Superposition of perturbed eigenstates evolved with the perturbed
+    # energies; shape (len(t), len(x)) for an array of times
+    energies, psi = corrected_levels(x, L, n_states, epsilon, order)
+    frames = evolve(psi, energies, coeffs, t)
+    return frames if np.ndim(t) else frames[0]
+
+def Psi_mixed_prime_chunks(x, t, L, coeffs, n_states, epsilon=0.1, order=2, chunk_size=None, max_bytes=64 * 2**20):
+    # Generator of (t_chunk, Ψ'_chunk) blocks, e.g. for time_evolution.save_frames
+    energies, psi = corrected_levels(x, L, n_states, epsilon, order)
+    return evolve_chunks(psi, energies, coeffs, t, chunk_size=chunk_size, max_bytes=max_bytes)
+
+def adaptive_corrections(n, epsilon, L, order=2, tol=1e-10, max_size=2000):
+    # perturbation_series with the intermediate states grown until every
+    # E^(k) is stable to tol instead of stopping at max_states; also returns
+    # the per-order error estimate and the number of states used
+    return adaptive_series(lambda N: E_n(np.arange(1, N + 1), L),
+                           lambda N: perturbation_matrix(V_prime_coefficients(epsilon), L, N),
+                           n - 1, order, tol, max_size=max_size)
+
+def custom_corrections(x, L, V, n=1, order=2, n_max=None):
+    # Corrections for an arbitrary perturbation V' of the well, given as a
+    # vectorized callable or as uniform samples on [0, L]; its box-basis
+    # matrix comes from one discrete cosine transform. Returns E^(0..order),
+    # the corrections ψ^(0..order) on x and the normalized corrected state.
+    if n_max is None:
+        n_max = max(n, max_states)
+    H = perturbation_matrix(V, L, n_max, method='transform')
+    energies, C = rs_series(E_n(np.arange(1, n_max + 1), L), H, n - 1, order)
+    psi = C @ box_basis(n_max, x, L)
+    return energies, psi, normalize(psi.sum(axis=0), x)
+
+def corrected_wavefunction(x, L, epsilon=0.1, n=1, order=2, out=None, chunk_size=None, max_bytes=64 * 2**20):
+    # Normalized Σ_k ψ^(k) on grids too fine for energy_and_wavefunctions_corrections,
+    # synthesized block by block in bounded memory. x may be (start, stop, num)
+    # instead of an array and out the path of a .npy file (memory-mapped).
+    _, C = perturbation_series(n, epsilon, L, order)
+    return synthesize(C.sum(axis=0), lambda xb: box_basis(C.shape[1], xb, L, cache=False), x, out,
+                      chunk_size=chunk_size, max_bytes=max_bytes)
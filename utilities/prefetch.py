@@ -0,0 +1,96 @@
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError
+
+def neighbours(state, axes):
+    """Parameter states one slider step away from state, one axis at a time.
+
+    axes lists (name, step, low, high) in order of priority; values are
+    rounded so that they compare equal to the ones the slider returns.
+    """
+    found = []
+    for name, step, low, high in axes:
+        for direction in (1, -1):
+            value = round(state[name] + direction * step, 10)
+            if low <= value <= high:
+                found.append({**state, name: type(state[name])(value)})
+    return found
+
+class Prefetcher:
+    """Thread pool filling a ResultCache with results that are likely to be requested next.
+
+    Each client (one browser session) owns the keys of its last schedule()
+    call. Scheduling again cancels the queued tasks that no client wants any
+    more, so jumping elsewhere leaves no backlog of stale work; tasks already
+    running finish and still land in the cache.
+    """
+
+    def __init__(self, cache, max_workers):
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        # Reentrant: cancelling a future runs its done callback in this thread
+        self._lock = threading.RLock()
+        self._futures = {}
+        self._clients = {}
+        self.scheduled = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def schedule(self, client, requests):
+        """Queue compute() for every (key, compute) pair of requests not cached yet, replacing client's previous batch."""
+        with self._lock:
+            self._clients[client] = {key for key, _ in requests}
+            # Clients whose work is all done drop out, so ended sessions are forgotten
+            self._clients = {c: keys for c, keys in self._clients.items()
+                             if c == client or keys & self._futures.keys()}
+            wanted = set().union(*self._clients.values())
+            for key in list(self._futures):
+                if key not in wanted and self._futures[key].cancel():
+                    self.cancelled += 1
+            for key, compute in requests:
+                if key in self._futures or key in self.cache:
+                    continue
+                future = self._pool.submit(self._run, key, compute)
+                self._futures[key] = future
+                future.add_done_callback(lambda f, key=key: self._forget(key, f))
+                self.scheduled += 1
+
+    def _run(self, key, compute):
+        if key in self.cache:
+            return
+        try:
+            self.cache.put(key, compute())
+        except Exception:
+            # A failed guess costs nothing: the foreground computes and reports it
+            with self._lock:
+                self.failed += 1
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def wait(self, key, timeout=None):
+        """Block until a queued or running computation of key finishes; no-op when none is pending."""
+        with self._lock:
+            future = self._futures.get(key)
+        if future is None:
+            return
+        try:
+            future.result(timeout)
+        except (CancelledError, TimeoutError):
+            pass
+
+    def stats(self):
+        """Task counters and the number of pending tasks."""
+        with self._lock:
+            return {
+                'pending': len(self._futures),
+                'clients': len(self._clients),
+                'scheduled': self.scheduled,
+                'cancelled': self.cancelled,
+                'failed': self.failed,
+            }
+
+    def shutdown(self):
+        """Cancel queued tasks and stop the workers."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,200 @@
+import numpy as np
+from numpy.polynomial.hermite import hermgauss
+from numpy.polynomial.polynomial import polyval
+from config import hbar, max_states
+from utilities.grid import points
+from utilities.disk_cache import cached_array, fingerprint
+from utilities.matrix_elements import box_basis, perturbation_matrix
+from utilities.unperturbed_harmonic_oscillator import hermite_functions
+import utilities.unperturbed_harmonic_oscillator as harm
+from utilities.ladder_operators import polynomial_operator
+from utilities.rayleigh_schrodinger import rs_series
+from utilities.wavefunction import Wavefunction
+import utilities.perturbed_potential_well_utilities as well
+import utilities.perturbed_charged_particle as char
+
+# Solver paths of each basis, cheapest first. Polynomial perturbations can take
+# every path; a general potential V(x) only those that sample it.
+PATHS = {
+    'box': ('closed form', 'transform', 'quadrature'),
+    'oscillator': ('banded', 'quadrature'),
+}
+SAMPLING_PATHS = {'transform', 'quadrature'}
+
+class Problem:
+    """A perturbed problem declared by its basis, its parameters and its perturbation.
+
+    basis is 'box' (sine basis on [0, L], levels n = 1, 2, ..., parameter L)
+    or 'oscillator' (number basis, levels n = 0, 1, ..., parameters m and
+    omega). spectrum(params, n) gives the unperturbed energies of the levels
+    n, normally the E_n of the problem's unperturbed module. The perturbation
+    is either coefficients(params) -> (c_0, c_1, ...) of a polynomial in x,
+    which opens the closed-form and banded paths, or potential(params) -> V,
+    a vectorized function of x. defaults lists every parameter, including n.
+    """
+
+    def __init__(self, name, basis, defaults, spectrum, coefficients=None, potential=None):
+        if basis not in PATHS:
+            raise ValueError(f"unknown basis '{basis}'")
+        if (coefficients is None) == (potential is None):
+            raise ValueError("give exactly one of coefficients and potential")
+        self.name = name
+        self.basis = basis
+        self.defaults = dict(defaults)
+        self.spectrum = spectrum
+        self.coefficients = coefficients
+        self.potential = potential
+
+    def __repr__(self):
+        return f"Problem('{self.name}', basis='{self.basis}', paths={self.paths()})"
+
+    def paths(self):
+        """Supported solver paths, cheapest first."""
+        if self.coefficients is None:
+            return [path for path in PATHS[self.basis] if path in SAMPLING_PATHS]
+        return list(PATHS[self.basis])
+
+    def parameters(self, **params):
+        """Defaults updated with params, rejecting unknown names."""
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"'{self.name}' takes no parameter {', '.join(sorted(unknown))}")
+        return {**self.defaults, **params}
+
+    def V(self, params):
+        """The perturbation as a vectorized function of x."""
+        if self.potential is not None:
+            return self.potential(params)
+        coeffs = self.coefficients(params)
+        return lambda x: polyval(x, coeffs)
+
+PROBLEMS = {}
+
+def register(problem):
+    """Add problem to the registry under its name and return it."""
+    PROBLEMS[problem.name] = problem
+    return problem
+
+def get(problem):
+    """Registered problem by name (a Problem passes through)."""
+    if isinstance(problem, Problem):
+        return problem
+    if problem not in PROBLEMS:
+        raise ValueError(f"unknown problem '{problem}'; registered: {', '.join(PROBLEMS)}")
+    return PROBLEMS[problem]
+
+def plan(problem, method=None):
+    """Solver path solve() takes for problem: method if supported, else the cheapest one."""
+    problem = get(problem)
+    paths = problem.paths()
+    if method is None:
+        return paths[0]
+    if method not in paths:
+        raise ValueError(f"'{problem.name}' supports {', '.join(paths)}, not '{method}'")
+    return method
+
+def level_index(problem, n):
+    """0-based basis index of level n (box levels start at 1, oscillator levels at 0); rejects levels below the first."""
+    first = 1 if get(problem).basis == 'box' else 0
+    if np.any(np.asarray(n) < first):
+        raise ValueError(f"'{get(problem).name}' levels start at n = {first}, got n = {n}")
+    return np.asarray(n) - first if np.ndim(n) else n - first
+
+def spectrum(problem, params, size):
+    """First size unperturbed energies."""
+    problem = get(problem)
+    first = 1 if problem.basis == 'box' else 0
+    return problem.spectrum(params, np.arange(first, first + size))
+
+def basis_size(problem, params, order, path):
+    """Number of basis states used for level n."""
+    problem = get(problem)
+    n = params['n']
+    if path == 'banded':
+        # x^k couples n to n±k only: this size makes the series exact
+        return n + (len(problem.coefficients(params)) - 1) * order + 1
+    if problem.basis == 'box':
+        return max(n, max_states)
+    return 2 * max(n + 1, max_states)
+
+def hermite_quadrature_matrix(V, N, m, omega, hbar=hbar, n_nodes=None):
+    """Number-basis matrix <ψ_j|V|ψ_k>, j, k < N, of a vectorized V by Gauss-Hermite quadrature."""
+    if n_nodes is None:
+        n_nodes = 2 * N + 40
+    xi, w = hermgauss(n_nodes)
+    scale = np.sqrt(m * omega / hbar)
+    # ψ_j ψ_k carries e^{-ξ²}: undo it in the weights, in logs since w underflows
+    with np.errstate(divide='ignore'):
+        weights = np.exp(np.log(w) + xi**2) / scale
+    x = xi / scale
+    values = np.asarray(V(x), dtype=float)
+    parts = lambda: {'matrix': 'hermite quadrature', 'N': N, 'm': m, 'omega': omega, 'hbar': hbar,
+                     'n_nodes': n_nodes, 'V': fingerprint(values)}
+    return cached_array(parts, lambda: _hermite_quadrature(hermite_functions(N - 1, x, m, omega, hbar, cache=False), weights * values))
+
+def _hermite_quadrature(basis, weights):
+    return (basis * weights) @ basis.T
+
+def perturbation(problem, params, size, path):
+    """The perturbation in the first size basis states, as a dense matrix or a BandedOperator."""
+    problem = get(problem)
+    if problem.basis == 'box':
+        V = problem.coefficients(params) if path == 'closed form' else problem.V(params)
+        return perturbation_matrix(V, params['L'], size, method=path)
+    if path == 'banded':
+        return polynomial_operator(problem.coefficients(params), size, params['m'], params['omega'], hbar)
+    return hermite_quadrature_matrix(problem.V(params), size, params['m'], params['omega'], hbar)
+
+def state_basis(problem, params):
+    """Basis description of the problem's Wavefunction states."""
+    if get(problem).basis == 'box':
+        return ('box', params['L'])
+    return ('oscillator', params['m'], params['omega'], hbar)
+
+def basis_table(problem, params, size, x):
+    """The first size unperturbed eigenfunctions tabulated on x (an array or a Grid)."""
+    if get(problem).basis == 'box':
+        return box_basis(size, x, params['L'])
+    return hermite_functions(size - 1, x, params['m'], params['omega'], hbar)
+
+def solve(problem, order=2, x=None, method=None, wavefunction_order=None, **params):
+    """Rayleigh-Schrödinger corrections of a registered problem through the cheapest solver path.
+
+    Returns a dict with the parameters used, the 'path' taken, the energies
+    E^(0..order), the basis coefficients of ψ^(0..order), the basis size,
+    the corrections as lazy 'states' (Wavefunction) and 'state', their sum
+    up to wavefunction_order (default order) normalized in coefficient
+    space. With a grid x it also holds 'x', the corrections 'psi' on x and
+    'psi_total', 'state' evaluated on x.
+    """
+    problem = get(problem)
+    params = problem.parameters(**params)
+    path = plan(problem, method)
+    size = basis_size(problem, params, order, path)
+    energies, C = rs_series(spectrum(problem, params, size), perturbation(problem, params, size, path),
+                            level_index(problem, params['n']), order)
+    if wavefunction_order is None:
+        wavefunction_order = order
+    states = [Wavefunction(c, state_basis(problem, params)) for c in C]
+    solution = {'problem': problem.name, 'params': params, 'path': path, 'basis_size': size,
+                'energies': energies, 'coefficients': C, 'states': states,
+                'state': sum(states[:wavefunction_order + 1]).normalized()}
+    if x is not None:
+        # One table serves the corrections and 'state', which has the same basis size
+        table = basis_table(problem, params, size, x)
+        solution.update(x=points(x), psi=C @ table, psi_total=solution['state'].coefficients @ table)
+    return solution
+
+def oscillator_spectrum(params, n):
+    return harm.E_n(n, params['m'], params['omega'], hbar)
+
+register(Problem('well', 'box', {'L': 1.0, 'epsilon': 0.1, 'n': 1},
+                 lambda p, n: well.E_n(n, p['L']),
+                 coefficients=lambda p: well.V_prime_coefficients(p['epsilon'])))
+register(Problem('charged', 'box', {'L': 1.0, 'q': 1.0, 'E_field': 0.1, 'n': 1},
+                 lambda p, n: char.E_n(n, p['L']),
+                 coefficients=lambda p: char.V_prime_coefficients(p['q'], p['E_field'])))
+register(Problem('oscillator', 'oscillator', {'m': 1.0, 'omega': 1.0, 'epsilon': 0.1, 'n': 0},
+                 oscillator_spectrum, coefficients=lambda p: (0.0, p['epsilon'])))
+register(Problem('anharmonic', 'oscillator', {'m': 1.0, 'omega': 1.0, 'g': 0.01, 'n': 0},
+                 oscillator_spectrum, coefficients=lambda p: (0.0, 0.0, 0.0, 0.0, p['g'])))
@@ -0,0 +1,100 @@
+import numpy as np
+from utilities.instrumentation import timed
+from utilities.grid import integrate
+
+def reduced_resolvent(E0, n):
+    """Diagonal of Q/(E_n - H0): 1/(E_n - E_m) for m != n and 0 at m = n."""
+    gaps = E0[n] - np.asarray(E0, dtype=float)
+    gaps[n] = np.inf
+    return 1.0 / gaps
+
+@timed('perturbation series')
+def rs_series(E0, H, n, order):
+    """Rayleigh-Schrödinger series of level index n up to the given order.
+
+    E0 is the unperturbed spectrum and H the perturbation matrix in the same
+    (0-based) basis. Returns the energy corrections E^(0..K), shape (K+1,),
+    and the basis coefficients of ψ^(0..K), shape (K+1, len(E0)), in
+    intermediate normalization (<n|ψ^(k)> = 0 for k > 0).
+    """
+    E0 = np.asarray(E0, dtype=float)
+    R = reduced_resolvent(E0, n)
+    energies = np.zeros(order + 1)
+    psi = np.zeros((order + 1, len(E0)))
+    energies[0] = E0[n]
+    psi[0, n] = 1.0
+    for k in range(1, order + 1):
+        # E^(k) = <n|V|ψ^(k-1)>,  ψ^(k) = R (V ψ^(k-1) - Σ_j E^(j) ψ^(k-j))
+        V_psi = H @ psi[k - 1]
+        energies[k] = V_psi[n]
+        psi[k] = R * (V_psi - energies[1:k + 1] @ psi[k - 1::-1])
+    return energies, psi
+
+def level_gaps(E0):
+    """Matrix of inverse gaps 1/(E_n - E_m) with zeros on the diagonal."""
+    E0 = np.asarray(E0, dtype=float)
+    gaps = E0[None, :] - E0[:, None]
+    np.fill_diagonal(gaps, np.inf)
+    return 1.0 / gaps
+
+@timed('perturbation series')
+def rs_series_all(E0, H, order):
+    """Rayleigh-Schrödinger series of every level of the basis at once.
+
+    Returns the energy corrections, shape (K+1, N) with level n in column n,
+    and the coefficients of ψ^(0..K), shape (K+1, N, N), where ψ^(k)[:, n]
+    belongs to level n. Same conventions as rs_series.
+    """
+    E0 = np.asarray(E0, dtype=float)
+    R = level_gaps(E0)
+    energies = np.zeros((order + 1, len(E0)))
+    psi = np.zeros((order + 1, len(E0), len(E0)))
+    energies[0] = E0
+    psi[0] = np.eye(len(E0))
+    for k in range(1, order + 1):
+        V_psi = H @ psi[k - 1]
+        energies[k] = np.diagonal(V_psi)
+        lower = np.einsum('jn,jmn->mn', energies[1:k + 1], psi[k - 1::-1])
+        psi[k] = R * (V_psi - lower)
+    return energies, psi
+
+@timed('normalization')
+def normalize(states, x):
+    """Normalize a stack of wavefunctions on x (an array or a Grid) along the last axis."""
+    return states / np.sqrt(integrate(np.abs(states)**2, x))[..., None]
+
+def normalized_states(psi, basis, x, n_levels):
+    """Corrected wavefunctions Σ_k ψ^(k) of the first n_levels on x, normalized, shape (n_levels, len(x))."""
+    return normalize(psi.sum(axis=0)[:, :n_levels].T @ basis, x)
+
+def sweep(energies, psi, strengths):
+    """Evaluate a series computed at unit strength for many strengths λ by broadcasting.
+
+    Corrections of order k scale as λ^k, so the result is the corrections
+    E^(k) λ^k, shape (len(strengths), K+1), and the coefficients of the
+    corrected state Σ_k λ^k ψ^(k), shape (len(strengths), N).
+    """
+    powers = np.asarray(strengths, dtype=float)[:, None] ** np.arange(len(energies))
+    return powers * energies, powers @ psi
+
+def adaptive_series(spectrum, matrix, n, order, tol, start=None, max_size=2000):
+    """rs_series with the basis grown until the corrections change by less than tol.
+
+    spectrum(N) returns the first N unperturbed energies and matrix(N) the
+    N x N perturbation matrix. The basis grows geometrically from start
+    (default n + order + 2) and stops once no energy correction moves by more
+    than tol between successive sizes, or at max_size. Returns the energies
+    and coefficients at the final size, the per-order error estimate (the
+    last change, shape (K+1,)) and the number of basis states used.
+    """
+    size = min(max_size, start if start is not None else n + order + 2)
+    energies, psi = rs_series(spectrum(size), matrix(size), n, order)
+    error = np.full(order + 1, np.inf)
+    while size < max_size:
+        size = min(max_size, size + max(4, size // 2))
+        new_energies, psi = rs_series(spectrum(size), matrix(size), n, order)
+        error = np.abs(new_energies - energies)
+        energies = new_energies
+        if error.max() < tol:
+            break
+    return energies, psi, error, size
@@ -0,0 +1,87 @@
+import sys
+import threading
+from collections import OrderedDict
+
+def nbytes(value):
+    """Approximate memory footprint of a cached value (arrays, bytes and containers of them)."""
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by the total size of its values, with hit/miss statistics."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None, count=True):
+        """Return the value stored under key and mark it as recently used; count=False leaves the statistics alone."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += count
+                return default
+            self._entries.move_to_end(key)
+            self.hits += count
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        """Store value under key, evicting least recently used entries to stay within max_bytes."""
+        size = nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, count=True):
+        """Return the cached value for key, calling compute() and storing its result on a miss."""
+        missing = object()
+        value = self.get(key, missing, count)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drop every entry (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,57 @@
+import numpy as np
+from functools import lru_cache
+import config
+from config import hbar
+from utilities.matrix_elements import monomial_matrix
+from utilities.ladder_operators import polynomial_operator
+from utilities.rayleigh_schrodinger import rs_series
+
+# Dimensionless units. In the box, u = x/L and energies are measured in
+# E_s = ħ²/(mL²), so H0 has levels n²π²/2 and c x^k becomes g u^k with
+# g = c m L^{k+2}/ħ². In the oscillator, ξ = x/a with a = sqrt(ħ/(mω)) and
+# E_s = ħω, so H0 has levels n + 1/2 and c x^k becomes g ξ^k with
+# g = c a^k/(ħω). The series of g u^k is g^j times that of u^k at order j, so
+# one dimensionless series serves every L, m, ω and strength; wavefunctions
+# follow as L^{-1/2} φ(x/L) (a^{-1/2} φ(x/a)) with unchanged coefficients.
+
+def box_energy_scale(L, m=None, hbar=hbar):
+    """E_s = ħ²/(mL²) of a box of length L (m defaults to config.m)."""
+    return hbar**2 / ((config.m if m is None else m) * L**2)
+
+def box_coupling(c, k, L, m=None, hbar=hbar):
+    """Dimensionless strength g of c x^k in a box of length L."""
+    return c * L**k / box_energy_scale(L, m, hbar)
+
+def oscillator_length(m, omega, hbar=hbar):
+    """a = sqrt(ħ/(mω))."""
+    return np.sqrt(hbar / (m * omega))
+
+def oscillator_coupling(c, k, m, omega, hbar=hbar):
+    """Dimensionless strength g of c x^k in an oscillator of mass m and frequency ω."""
+    return c * oscillator_length(m, omega, hbar)**k / (hbar * omega)
+
+@lru_cache(maxsize=128)
+def dimensionless_series(basis, k, n, order, size):
+    """Series of level n for the perturbation u^k ('box') or ξ^k ('oscillator') at unit coupling.
+
+    size is the number of basis states; box levels start at n = 1 and
+    oscillator levels at n = 0. Energies are in units of E_s and the
+    returned arrays are read-only.
+    """
+    if basis == 'box':
+        e0 = np.pi**2 / 2 * np.arange(1, size + 1)**2
+        E, C = rs_series(e0, monomial_matrix(k, 1.0, size), n - 1, order)
+    elif basis == 'oscillator':
+        unit = np.zeros(k + 1)
+        unit[k] = 1.0
+        E, C = rs_series(np.arange(size) + 0.5, polynomial_operator(unit, size, 1.0, 1.0, 1.0), n, order)
+    else:
+        raise ValueError(f"unknown basis '{basis}'")
+    E.setflags(write=False)
+    C.setflags(write=False)
+    return E, C
+
+def scaled_series(E, C, g, energy_scale):
+    """Physical series from a unit-coupling one: E^(j) = E_s g^j e^(j) and coefficients g^j c^(j)."""
+    powers = float(g) ** np.arange(len(E))
+    return energy_scale * powers * E, powers[:, None] * C
@@ -0,0 +1,70 @@
+import numpy as np
+from utilities.grid import integrate, points
+from utilities.instrumentation import timed
+
+# Wavefunctions on grids of 10^6-10^7 points are synthesized block by block:
+# only one block of the basis table and of the result is alive at a time, and
+# the normalization integral is accumulated as the blocks go by.
+
+def n_grid_points(x):
+    """Number of points of a grid given as an array, a Grid or (start, stop, num)."""
+    return int(x[2]) if isinstance(x, tuple) else len(points(x))
+
+def grid_blocks(x, block):
+    """Yield consecutive blocks of at most block points of x.
+
+    x is an array (possibly memory-mapped), a Grid or a tuple (start, stop,
+    num) describing np.linspace(start, stop, num), whose blocks are generated
+    on the fly so that the grid itself is never held in memory.
+    """
+    if not isinstance(x, tuple):
+        x = points(x)
+    size = n_grid_points(x)
+    for first in range(0, size, block):
+        if isinstance(x, tuple):
+            start, stop, num = x
+            yield start + (stop - start) * np.arange(first, min(first + block, size)) / (num - 1)
+        else:
+            yield np.asarray(x[first:first + block], dtype=float)
+
+def block_length(n_rows, max_bytes):
+    """Grid points per block so that a block of n_rows basis functions plus the result fits in max_bytes."""
+    return max(2, int(max_bytes // (8 * (n_rows + 2))))
+
+@timed('synthesis')
+def synthesize(coeffs, tabulate, x, out=None, normalize=True, chunk_size=None, max_bytes=64 * 2**20):
+    """Σ_k coeffs[k] f_k(x) evaluated block by block, normalized on x unless normalize is False.
+
+    tabulate(x_block) returns the basis functions on a block, shape
+    (len(coeffs), len(x_block)). out is None (a new array), an array of
+    n_grid_points(x) values, or the path of a .npy file written through a
+    memory map. Peak memory is set by chunk_size, or by max_bytes without it,
+    and not by the grid size. Returns out.
+    """
+    coeffs = np.asarray(coeffs)
+    size = n_grid_points(x)
+    if chunk_size is None:
+        chunk_size = block_length(len(coeffs), max_bytes)
+    if out is None:
+        out = np.empty(size)
+    elif isinstance(out, str):
+        out = np.lib.format.open_memmap(out, mode='w+', dtype=float, shape=(size,))
+    norm2 = 0.0
+    last = None
+    start = 0
+    for x_block in grid_blocks(x, chunk_size):
+        values = coeffs @ tabulate(x_block)
+        out[start:start + len(x_block)] = values
+        # Trapezoid rule inside the block plus the interval joining it to the previous one
+        norm2 += integrate(values**2, x_block)
+        if last is not None:
+            norm2 += 0.5 * (x_block[0] - last[0]) * (values[0]**2 + last[1]**2)
+        last = (x_block[-1], values[-1])
+        start += len(x_block)
+    if normalize and norm2 > 0:
+        scale = 1.0 / np.sqrt(norm2)
+        for first in range(0, size, chunk_size):
+            out[first:first + chunk_size] *= scale
+    if hasattr(out, 'flush'):
+        out.flush()
+    return out
@@ -0,0 +1,49 @@
+import numpy as np
+from config import hbar
+from utilities.instrumentation import timed
+
+def phases(t, energies, hbar=hbar):
+    """Phase factors e^{-i E_n t/ħ}, shape (len(t), len(energies))."""
+    return np.exp(-1j * np.outer(t, energies) / hbar)
+
+@timed('time evolution')
+def evolve(basis, energies, coeffs, t, hbar=hbar):
+    """Ψ(x, t) = Σ_n c_n f_n(x) e^{-i E_n t/ħ} on every time of t, shape (len(t), len(x)).
+
+    basis holds the tabulated f_n as rows, shape (len(energies), len(x)); the
+    whole time array costs one matrix product.
+    """
+    weighted = np.asarray(coeffs)[:, None] * basis
+    return phases(np.atleast_1d(t), energies, hbar) @ weighted
+
+def chunk_length(n_points, max_bytes):
+    """Number of complex128 frames of n_points values that fit in max_bytes (at least one)."""
+    return max(1, int(max_bytes // (16 * n_points)))
+
+def evolve_chunks(basis, energies, coeffs, t, hbar=hbar, chunk_size=None, max_bytes=64 * 2**20):
+    """Yield (t_chunk, Ψ_chunk) blocks of evolve, each holding at most chunk_size times.
+
+    Without chunk_size the block length is chosen so that one block stays
+    within max_bytes, which bounds memory for arbitrarily long time arrays.
+    """
+    t = np.atleast_1d(t)
+    weighted = np.asarray(coeffs)[:, None] * basis
+    if chunk_size is None:
+        chunk_size = chunk_length(basis.shape[1], max_bytes)
+    for start in range(0, len(t), chunk_size):
+        t_chunk = t[start:start + chunk_size]
+        yield t_chunk, phases(t_chunk, energies, hbar) @ weighted
+
+def save_frames(path, chunks, n_times, n_points):
+    """Stream (t_chunk, Ψ_chunk) blocks into a complex .npy file of shape (n_times, n_points).
+
+    Frames are written through a memory map as they arrive, so the file can
+    be far larger than memory; the map is returned for immediate reading.
+    """
+    frames = np.lib.format.open_memmap(path, mode='w+', dtype=complex, shape=(n_times, n_points))
+    start = 0
+    for t_chunk, psi_chunk in chunks:
+        frames[start:start + len(t_chunk)] = psi_chunk
+        start += len(t_chunk)
+    frames.flush()
+    return frames
@@ -1,19 +1,62 @@
 import numpy as np
-import math
-from config import *
-from numpy.polynomial.hermite import hermval
+from config import hbar
+from utilities.instrumentation import timed
+from utilities.disk_cache import cached_array, fingerprint
+from utilities.grid import Grid
 
-def hermite_phys(n, z):
-    """Physicists' Hermite polynomial H_n(z)."""
-    c = np.zeros(n+1)
-    c[-1] = 1.0
-    return hermval(z, c)
+def _hermite_recurrence(N, xi):
+    """Yield ψ_0(ξ)..ψ_N(ξ) of the dimensionless oscillator, one row at a time."""
+    # The recurrence runs on ψ_n e^{ξ²/2}; the Gaussian is kept as a per-point
+    # log scale that absorbs rescalings, so nothing overflows or underflows
+    # before the final product.
+    log_scale = -xi**2 / 2.0
+    weight = np.exp(log_scale)
+    prev = np.zeros_like(xi)
+    cur = np.full_like(xi, np.pi**-0.25)
+    yield cur * weight
+    for n in range(N):
+        prev, cur = cur, np.sqrt(2.0/(n+1)) * xi * cur - np.sqrt(n/(n+1)) * prev
+        big = np.maximum(np.abs(cur), np.abs(prev))
+        if big.max() > 1e100:
+            s = np.where(big > 1e100, big, 1.0)
+            cur, prev = cur / s, prev / s
+            log_scale += np.log(s)
+            weight = np.exp(log_scale)
+        yield cur * weight
+
+@timed('basis evaluation', counter='basis evaluations')
+def _hermite_functions(N, x, m, omega, hbar):
+    xi = np.sqrt(m*omega/hbar) * x
+    out = np.empty((N+1,) + xi.shape)
+    for n, row in enumerate(_hermite_recurrence(N, xi)):
+        out[n] = row
+    return out * (m*omega/hbar)**0.25
+
+def hermite_functions(N, x, m, omega, hbar=hbar, cache=True):
+    """Normalized eigenfunctions ψ_0..ψ_N on x, shape (N+1, len(x)), stable for large N.
+
+    cache=False skips the Grid and disk caches, for one-off blocks of a grid.
+    """
+    if isinstance(x, Grid):
+        return x.table(('hermite functions', N, m, omega, hbar), lambda: hermite_functions(N, x.x, m, omega, hbar))
+    x = np.asarray(x, dtype=float)
+    if not cache:
+        return _hermite_functions(N, x, m, omega, hbar)
+    parts = lambda: {'table': 'hermite functions', 'N': N, 'm': m, 'omega': omega, 'hbar': hbar, 'x': fingerprint(x)}
+    return cached_array(parts, lambda: _hermite_functions(N, x, m, omega, hbar))
 
 def f_n(n, x, m, omega, hbar=hbar):
     """Normalized harmonic oscillator eigenfunction ψ_n(x)."""
-    xi = np.sqrt(m*omega/hbar) * x
-    norm = (m*omega/(np.pi*hbar))**0.25 / np.sqrt(2.0**n * math.factorial(n))
-    return norm * hermite_phys(n, xi) * np.exp(-xi**2/2.0)
+    if isinstance(x, Grid):
+        return hermite_functions(n, x, m, omega, hbar)[n]
+    return _f_n(n, x, m, omega, hbar)
+
+@timed('basis evaluation', counter='basis evaluations')
+def _f_n(n, x, m, omega, hbar):
+    xi = np.sqrt(m*omega/hbar) * np.asarray(x, dtype=float)
+    for row in _hermite_recurrence(n, xi):
+        pass
+    return row * (m*omega/hbar)**0.25
 
 def E_n(n, m, omega, hbar=hbar):
     """Unperturbed energy of the HO."""
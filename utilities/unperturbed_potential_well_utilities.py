@@ -1,22 +1,34 @@
 import numpy as np
-from config import *
+from config import hbar, m
+from utilities.grid import Grid
+from utilities.matrix_elements import box_basis
+from utilities.time_evolution import evolve, evolve_chunks
 
 def E_n(n, L):
     return (n**2 * np.pi**2 * hbar**2) / (2 * m * L**2)
 
 def f_n(n, x, L):
+    if isinstance(x, Grid):
+        return x.table(('box f_n', n, L), lambda: f_n(n, x.x, L))
     return np.sqrt(2 / L) * np.sin(n * np.pi * x / L)
 
 def Psi(n, x, L, t):
     E = E_n(n, L)
     psi_x = f_n(n, x, L)
-    return psi_x * np.exp(-1j * E * t / hbar)
+    # An array of times gives one row per time
+    return psi_x * np.exp(-1j * E * np.asarray(t)[..., None] / hbar)
+
+def _mixed_basis(x, L, n_states):
+    n = np.asarray(n_states)
+    return box_basis(int(n.max()), x, L)[n - 1], E_n(n, L)
 
 def Psi_mixed(x, t, L, coeffs, n_states):
-    psi_t = np.zeros_like(x, dtype=complex)
-    for idx, n in enumerate(n_states):
-        psi_x = f_n(n, x, L)
-        E = E_n(n, L)
-        time_factor = np.exp(-1j * E * t / hbar)
-        psi_t += coeffs[idx] * psi_x * time_factor
-    return psi_t
+    # Scalar t gives Ψ(x, t); an array of times gives shape (len(t), len(x))
+    basis, energies = _mixed_basis(x, L, n_states)
+    psi = evolve(basis, energies, coeffs, t)
+    return psi if np.ndim(t) else psi[0]
+
+def Psi_mixed_chunks(x, t, L, coeffs, n_states, chunk_size=None, max_bytes=64 * 2**20):
+    # Generator of (t_chunk, Ψ_chunk) blocks bounded by chunk_size or max_bytes
+    basis, energies = _mixed_basis(x, L, n_states)
+    return evolve_chunks(basis, energies, coeffs, t, chunk_size=chunk_size, max_bytes=max_bytes)
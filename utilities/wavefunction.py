@@ -0,0 +1,111 @@
+import numbers
+import numpy as np
+from config import hbar
+from utilities.matrix_elements import box_basis
+from utilities.unperturbed_harmonic_oscillator import hermite_functions
+from utilities.synthesis import synthesize
+
+def _table(basis, size, x, cache=True):
+    kind, *params = basis
+    if kind == 'box':
+        return box_basis(size, x, *params, cache=cache)
+    if kind == 'oscillator':
+        return hermite_functions(size - 1, x, *params, cache=cache)
+    raise ValueError(f"unknown basis '{kind}'")
+
+class Wavefunction:
+    """A state Σ_k c_k f_k kept as its coefficients in an orthonormal basis.
+
+    basis is ('box', L) for the sine basis f_1, f_2, ... on [0, L] or
+    ('oscillator', m, omega, hbar) for ψ_0, ψ_1, ... Sums, scaling, norms
+    (Parseval: ||ψ||² = Σ_k |c_k|²) and overlaps never touch a grid; the
+    state is tabulated only by evaluate(x), with one matrix-vector product.
+    """
+
+    __slots__ = ('coefficients', 'basis')
+    # Arrays defer to our operators instead of broadcasting over the state
+    __array_ufunc__ = None
+
+    def __init__(self, coefficients, basis):
+        self.coefficients = np.asarray(coefficients)
+        self.basis = tuple(basis)
+
+    def __len__(self):
+        return len(self.coefficients)
+
+    def __repr__(self):
+        return f"Wavefunction({len(self)} coefficients, basis={self.basis}, norm={self.norm():.6g})"
+
+    def _padded(self, other):
+        if other.basis != self.basis:
+            raise ValueError(f"cannot combine states of bases {self.basis} and {other.basis}")
+        size = max(len(self), len(other))
+        return (np.pad(self.coefficients, (0, size - len(self))),
+                np.pad(other.coefficients, (0, size - len(other))))
+
+    def __add__(self, other):
+        if isinstance(other, numbers.Number) and other == 0:
+            # So that sum() works on a list of states
+            return self
+        if not isinstance(other, Wavefunction):
+            return NotImplemented
+        a, b = self._padded(other)
+        return Wavefunction(a + b, self.basis)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, Wavefunction):
+            return NotImplemented
+        a, b = self._padded(other)
+        return Wavefunction(a - b, self.basis)
+
+    def __mul__(self, scalar):
+        if not isinstance(scalar, numbers.Number):
+            return NotImplemented
+        return Wavefunction(scalar * self.coefficients, self.basis)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        if not isinstance(scalar, numbers.Number):
+            return NotImplemented
+        return Wavefunction(self.coefficients / scalar, self.basis)
+
+    def __neg__(self):
+        return Wavefunction(-self.coefficients, self.basis)
+
+    def norm(self):
+        """||ψ|| from the coefficients (Parseval)."""
+        return float(np.sqrt(np.sum(np.abs(self.coefficients)**2)))
+
+    def normalized(self):
+        """The state scaled to unit norm (unchanged if it vanishes)."""
+        norm = self.norm()
+        return self / norm if norm > 0 else self
+
+    def overlap(self, other):
+        """<self|other> from the coefficients."""
+        if not isinstance(other, Wavefunction):
+            raise TypeError(f"overlap needs a Wavefunction, not {type(other).__name__}")
+        a, b = self._padded(other)
+        return np.vdot(a, b)
+
+    def evaluate(self, x):
+        """Values on x (an array or a Grid)."""
+        return self.coefficients @ _table(self.basis, len(self), x)
+
+    __call__ = evaluate
+
+    def synthesize(self, x, out=None, normalize=False, chunk_size=None, max_bytes=64 * 2**20):
+        """evaluate() block by block for very fine grids; see synthesis.synthesize."""
+        return synthesize(self.coefficients, lambda xb: _table(self.basis, len(self), xb, cache=False), x, out,
+                          normalize=normalize, chunk_size=chunk_size, max_bytes=max_bytes)
+
+def box_state(coefficients, L):
+    """State of sine-basis coefficients on [0, L]."""
+    return Wavefunction(coefficients, ('box', L))
+
+def oscillator_state(coefficients, m, omega, hbar=hbar):
+    """State of number-basis coefficients of the oscillator (m, ω)."""
+    return Wavefunction(coefficients, ('oscillator', m, omega, hbar))